@@ -0,0 +1,84 @@
+import threading
+import time
+from metrics import timed
+from storage import SQLiteConnections
+
+
+class AnalysisScheduler(SQLiteConnections):
+    """Runs Gemini analyses with bounded concurrency, a shared rate limit and a
+    persistent result cache keyed by the audio SHA-256. Identical audio only
+    ever costs one model call. Each analysis makes a single call; a failure is
+    raised to the caller, whose job stage owns the retries and backoff."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            audio_hash TEXT PRIMARY KEY,
+            report TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, analyze, cache_path, rate_limit, concurrency=2):
+        self._analyze = analyze
+        self.path = cache_path
+        # a bucket shared by every worker process, so the account-wide quota holds
+        self._bucket = rate_limit
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._in_progress = {}
+        self.stats = {'cache_hits': 0, 'model_calls': 0, 'failures': 0}
+        self._conn().executescript(self.SCHEMA)
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def cached(self, audio_hash):
+        row = self._conn().execute(
+            'SELECT report FROM analysis_cache WHERE audio_hash = ?', (audio_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def analyze(self, audio_hash, file_path):
+        """Returns the report for this audio, calling the model only on a cache miss"""
+        while True:
+            report = self.cached(audio_hash)
+            if report is not None:
+                self._count('cache_hits')
+                return report
+
+            # collapse concurrent requests for the same audio onto a single model call
+            with self._lock:
+                pending = self._in_progress.get(audio_hash)
+                if pending is None:
+                    pending = self._in_progress[audio_hash] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                pending.wait()
+                # re-check the cache; if the owner failed, this caller takes over
+                continue
+
+            try:
+                report = self._call(file_path)
+                self._conn().execute(
+                    'INSERT OR REPLACE INTO analysis_cache (audio_hash, report, created_at) VALUES (?, ?, ?)',
+                    (audio_hash, report, time.time())
+                )
+                return report
+            finally:
+                with self._lock:
+                    del self._in_progress[audio_hash]
+                pending.set()
+
+    def _call(self, file_path):
+        self._bucket.acquire()
+        with self._slots:
+            self._count('model_calls')
+            try:
+                with timed('gemini_analysis'):
+                    return self._analyze(file_path)
+            except Exception:
+                self._count('failures')
+                raise
@@ -0,0 +1,173 @@
+import time
+from storage import SQLiteConnections
+
+GRANULARITIES = {'hour': 3600, 'day': 86400}
+DIMENSIONS = ('state', 'city', 'category', 'priority')
+
+
+# per grievance column: the condition (on the row alias) under which a row is
+# counted in the `<column>:<value>` counter and in the column's rollup dimension;
+# None means the column has no counter or no rollup
+COUNTED_COLUMNS = {
+    'status': {'counter': "1", 'rollup': None},
+    'category': {'counter': "1", 'rollup': "{row}.category != 'Unknown'"},
+    'priority': {'counter': "COALESCE({row}.priority, '') != ''", 'rollup': "COALESCE({row}.priority, '') != ''"},
+    'state': {'counter': None, 'rollup': "1"},
+    'city': {'counter': None, 'rollup': "1"},
+}
+
+
+class AnalyticsRollup(SQLiteConnections):
+    """Counters and hour/day rollups kept up to date on every ingest and status change.
+
+    Reads are O(1) in the number of tickets: the dashboard never scans grievances.
+    Rollups are bucketed by the ticket's creation time, so late events such as an
+    AI report arriving still land in the bucket the call was made in. The counts
+    are maintained by triggers on the grievances table, so they change in the
+    same transaction as the grievance itself and cannot drift from it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analytics_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS analytics_rollups (
+            granularity TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (granularity, dimension, bucket, value)
+        );
+    """
+
+    # bump when the trigger definitions change, so existing databases are rebuilt
+    TRIGGER_VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        with self._transaction(conn):
+            installed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                (f'analytics_v{self.TRIGGER_VERSION}_insert',)
+            ).fetchone()
+            if not installed:
+                # triggers and backfill in one transaction: no write is counted twice or missed
+                for (name,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'analytics_%'"
+                ).fetchall():
+                    conn.execute(f'DROP TRIGGER {name}')
+                for statement in self._triggers():
+                    conn.execute(statement)
+                self._rebuild(conn)
+                print("📊 Analytics rollups rebuilt from the grievance store")
+
+    @staticmethod
+    def _deltas(column, row, delta):
+        """Statements adding `delta` for one column of a row to the counters and rollups"""
+        spec = COUNTED_COLUMNS[column]
+        statements = []
+        if spec['counter']:
+            when = spec['counter'].format(row=row)
+            statements.append(
+                f"INSERT INTO analytics_counters (name, value) "
+                f"SELECT '{column}:' || COALESCE({row}.{column}, 'Unknown'), {delta} WHERE {when} "
+                f"ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;"
+            )
+        if spec['rollup']:
+            when = spec['rollup'].format(row=row)
+            for granularity, width in GRANULARITIES.items():
+                statements.append(
+                    f"INSERT INTO analytics_rollups (granularity, bucket, dimension, value, count) "
+                    f"SELECT '{granularity}', CAST({row}.created_at / {width} AS INTEGER) * {width}, '{column}', "
+                    f"COALESCE(NULLIF({row}.{column}, ''), 'Unknown'), {delta} WHERE {when} "
+                    f"ON CONFLICT(granularity, dimension, bucket, value) DO UPDATE SET count = count + excluded.count;"
+                )
+        return statements
+
+    def _triggers(self):
+        prefix = f'analytics_v{self.TRIGGER_VERSION}'
+        on_insert = ["INSERT INTO analytics_counters (name, value) VALUES ('total', 1) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + 1;"]
+        on_delete = ["UPDATE analytics_counters SET value = value - 1 WHERE name = 'total';"]
+        for column in COUNTED_COLUMNS:
+            on_insert += self._deltas(column, 'NEW', 1)
+            on_delete += self._deltas(column, 'OLD', -1)
+        triggers = [
+            f"CREATE TRIGGER {prefix}_insert AFTER INSERT ON grievances BEGIN {' '.join(on_insert)} END",
+            f"CREATE TRIGGER {prefix}_delete AFTER DELETE ON grievances BEGIN {' '.join(on_delete)} END",
+        ]
+        for column in COUNTED_COLUMNS:
+            body = self._deltas(column, 'OLD', -1) + self._deltas(column, 'NEW', 1)
+            triggers.append(
+                f"CREATE TRIGGER {prefix}_update_{column} AFTER UPDATE OF {column} ON grievances "
+                f"WHEN OLD.{column} IS NOT NEW.{column} BEGIN {' '.join(body)} END"
+            )
+        return triggers
+
+    def _rebuild(self, conn):
+        """Recomputes every counter and rollup from the grievances table, inside the caller's transaction"""
+        conn.execute('DELETE FROM analytics_counters')
+        conn.execute('DELETE FROM analytics_rollups')
+        conn.execute("INSERT INTO analytics_counters (name, value) SELECT 'total', COUNT(*) FROM grievances")
+        for column, spec in COUNTED_COLUMNS.items():
+            if spec['counter']:
+                when = spec['counter'].format(row='g')
+                conn.execute(
+                    f"INSERT INTO analytics_counters (name, value) "
+                    f"SELECT '{column}:' || COALESCE(g.{column}, 'Unknown'), COUNT(*) FROM grievances g "
+                    f"WHERE {when} GROUP BY 1"
+                )
+            if spec['rollup']:
+                when = spec['rollup'].format(row='g')
+                for granularity, width in GRANULARITIES.items():
+                    conn.execute(
+                        f"INSERT INTO analytics_rollups (granularity, bucket, dimension, value, count) "
+                        f"SELECT '{granularity}', CAST(g.created_at / {width} AS INTEGER) * {width}, '{column}', "
+                        f"COALESCE(NULLIF(g.{column}, ''), 'Unknown'), COUNT(*) FROM grievances g "
+                        f"WHERE {when} GROUP BY 2, 4"
+                    )
+
+    def rebuild(self):
+        """Recomputes all analytics from the grievance store, e.g. after restoring a backup"""
+        with self._transaction() as conn:
+            self._rebuild(conn)
+
+    def counters(self):
+        rows = self._conn().execute('SELECT name, value FROM analytics_counters').fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def summary(self):
+        """Totals for the dashboard stats bar and the category breakdown"""
+        counters = self.counters()
+        grouped = {'status': {}, 'category': {}, 'priority': {}}
+        for name, value in counters.items():
+            kind, _, label = name.partition(':')
+            if kind in grouped and value:
+                grouped[kind][label] = value
+        return {
+            'total': counters.get('total', 0),
+            'pending': grouped['status'].get('Pending', 0),
+            'resolved': grouped['status'].get('Resolved', 0),
+            'categories': dict(sorted(grouped['category'].items())),
+            'priorities': dict(sorted(grouped['priority'].items()))
+        }
+
+    def series(self, dimension, granularity='day', since=None, until=None):
+        """Time-bucketed counts for one dimension: [{bucket, value, count}, ...]"""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown analytics dimension: {dimension}")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown analytics granularity: {granularity}")
+        until = until if until is not None else time.time()
+        since = since if since is not None else until - 30 * 86400
+        rows = self._conn().execute(
+            'SELECT bucket, value, count FROM analytics_rollups '
+            'WHERE granularity = ? AND dimension = ? AND bucket >= ? AND bucket <= ? AND count != 0 '
+            'ORDER BY bucket, value',
+            (granularity, dimension, int(since // GRANULARITIES[granularity]) * GRANULARITIES[granularity], until)
+        ).fetchall()
+        return [{'bucket': row[0], 'value': row[1], 'count': row[2]} for row in rows]
@@ -0,0 +1,234 @@
+import json
+import threading
+import time
+from merkle import build_tree, leaf_hash, merkle_proof, verify_proof
+from storage import SQLiteConnections
+
+
+class BatchAnchorer(SQLiteConnections):
+    """Buffers grievance hashes and anchors them on-chain as one Merkle root per batch.
+
+    A batch is sealed once `batch_size` leaves are pending or the oldest pending
+    leaf is `interval` seconds old. Sealing stores every leaf's inclusion proof
+    locally before the root transaction is sent, so a ticket can be verified
+    against the anchored root without the rest of its batch. Sealing and sending
+    happen only on the anchorer's own thread; `add` never waits on the chain.
+    Roots that could not be sent are retried with exponential backoff, at most
+    `max_attempts` sends per root; after that the batch is marked failed.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS anchor_leaves (
+            grievance_id TEXT PRIMARY KEY,
+            audio_hash TEXT NOT NULL,
+            leaf BLOB NOT NULL,
+            batch_root BLOB,
+            leaf_index INTEGER,
+            proof TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_anchor_leaves_pending ON anchor_leaves(batch_root, created_at);
+
+        CREATE TABLE IF NOT EXISTS anchor_batches (
+            root BLOB PRIMARY KEY,
+            size INTEGER NOT NULL,
+            state TEXT NOT NULL DEFAULT 'sealed',
+            tx_hash TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            next_attempt_at REAL,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_anchor_batches_state ON anchor_batches(state);
+    """
+
+    def __init__(self, path, submit_root, batch_size=100, interval=60.0, backoff_base=5.0, backoff_max=900.0,
+                 max_attempts=8):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.submit_root = submit_root
+        self.batch_size = batch_size
+        self.interval = interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(anchor_batches)')}
+        if 'next_attempt_at' not in columns:
+            conn.execute('ALTER TABLE anchor_batches ADD COLUMN next_attempt_at REAL')
+
+    def add(self, grievance_id, audio_hash):
+        """Buffers a grievance for the next batch; a full batch wakes the anchorer thread"""
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR IGNORE INTO anchor_leaves (grievance_id, audio_hash, leaf, created_at) VALUES (?, ?, ?, ?)',
+            (str(grievance_id), audio_hash, leaf_hash(grievance_id, audio_hash), time.time())
+        )
+        if self.pending_count() >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_count(self):
+        return self._conn().execute(
+            'SELECT COUNT(*) FROM anchor_leaves WHERE batch_root IS NULL'
+        ).fetchone()[0]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='batch-anchorer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def _run(self):
+        poll = max(1.0, min(self.interval / 4, 15.0))
+        while not self._stopping.is_set():
+            self._wakeup.wait(poll)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                return
+            try:
+                oldest = self._conn().execute(
+                    'SELECT MIN(created_at) FROM anchor_leaves WHERE batch_root IS NULL'
+                ).fetchone()[0]
+                if oldest is not None and (time.time() - oldest >= self.interval
+                                           or self.pending_count() >= self.batch_size):
+                    self.flush()
+                self._resend_unsent()
+            except Exception as e:
+                print(f"❌ Batch anchoring error: {e}")
+
+    def _seal(self):
+        """Claims up to batch_size pending leaves and records their root and proofs"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT grievance_id, leaf FROM anchor_leaves WHERE batch_root IS NULL '
+                'ORDER BY created_at, grievance_id LIMIT ?',
+                (self.batch_size,)
+            ).fetchall()
+            if not rows:
+                conn.execute('ROLLBACK')
+                return None
+            levels = build_tree([row['leaf'] for row in rows])
+            root = levels[-1][0]
+            for index, row in enumerate(rows):
+                proof = [sibling.hex() for sibling in merkle_proof(levels, index)]
+                conn.execute(
+                    'UPDATE anchor_leaves SET batch_root = ?, leaf_index = ?, proof = ? WHERE grievance_id = ?',
+                    (root, index, json.dumps(proof), row['grievance_id'])
+                )
+            conn.execute(
+                'INSERT OR IGNORE INTO anchor_batches (root, size, created_at) VALUES (?, ?, ?)',
+                (root, len(rows), time.time())
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return root, len(rows)
+
+    def flush(self):
+        """Seals and anchors every full or partial batch currently pending"""
+        with self._flush_lock:
+            while True:
+                sealed = self._seal()
+                if sealed is None:
+                    return
+                self._send(*sealed)
+
+    def _send(self, root, size):
+        conn = self._conn()
+        try:
+            tx_hash = self.submit_root(root, size)
+        except Exception as e:
+            conn.execute('UPDATE anchor_batches SET attempts = attempts + 1 WHERE root = ?', (root,))
+            self._retry_later(root, str(e))
+            return None
+        conn.execute(
+            "UPDATE anchor_batches SET state = 'sent', tx_hash = ?, attempts = attempts + 1, sent_at = ? WHERE root = ?",
+            (tx_hash, time.time(), root)
+        )
+        print(f"✅ Anchored batch of {size} grievance(s), root 0x{root.hex()[:16]}…")
+        return tx_hash
+
+    def _resend_unsent(self):
+        """Retries roots whose send failed, once their backoff has passed"""
+        rows = self._conn().execute(
+            "SELECT root, size FROM anchor_batches WHERE state = 'sealed' "
+            "AND COALESCE(next_attempt_at, 0) <= ? ORDER BY created_at",
+            (time.time(),)
+        ).fetchall()
+        for row in rows:
+            if self._stopping.is_set():
+                return
+            with self._flush_lock:
+                self._send(row['root'], row['size'])
+
+    def _retry_later(self, root, error):
+        """Schedules another send with backoff, or gives the batch up once it is out of attempts"""
+        conn = self._conn()
+        attempts = conn.execute('SELECT attempts FROM anchor_batches WHERE root = ?', (root,)).fetchone()[0]
+        if attempts >= self.max_attempts:
+            conn.execute("UPDATE anchor_batches SET state = 'failed', last_error = ? WHERE root = ?", (error, root))
+            print(f"❌ Giving up on batch root 0x{root.hex()[:16]}… after {attempts} attempts: {error}")
+            return
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        conn.execute("UPDATE anchor_batches SET state = 'sealed', last_error = ?, next_attempt_at = ? WHERE root = ?",
+                     (error, time.time() + delay, root))
+        print(f"❌ Batch anchor failed for root 0x{root.hex()[:16]}… (retrying in {delay:.0f}s): {error}")
+
+    def requeue(self, root, error):
+        """Schedules a sent root for resending after its transaction failed or reverted"""
+        state = self._conn().execute('SELECT state FROM anchor_batches WHERE root = ?', (root,)).fetchone()
+        if state and state[0] == 'sent':
+            self._retry_later(root, error)
+
+    def mark_anchored(self, root):
+        """Records that the root is on-chain, e.g. when a duplicate send reverted as already anchored"""
+        self._conn().execute("UPDATE anchor_batches SET state = 'sent', last_error = NULL WHERE root = ?", (root,))
+
+    def members(self, root):
+        """Grievance ids sealed into the batch with the given root"""
+        rows = self._conn().execute(
+            'SELECT grievance_id FROM anchor_leaves WHERE batch_root = ? ORDER BY leaf_index', (root,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def record_tx(self, root, tx_hash):
+        """Points a batch at its replacement transaction after a gas bump"""
+        self._conn().execute('UPDATE anchor_batches SET tx_hash = ? WHERE root = ?', (tx_hash, root))
+
+    def proof_for(self, grievance_id):
+        """Locally stored inclusion proof for a sealed grievance, or None"""
+        row = self._conn().execute(
+            'SELECT l.grievance_id, l.audio_hash, l.leaf, l.batch_root, l.leaf_index, l.proof, '
+            'b.state, b.tx_hash, b.size, b.sent_at '
+            'FROM anchor_leaves l JOIN anchor_batches b ON b.root = l.batch_root '
+            'WHERE l.grievance_id = ?',
+            (str(grievance_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        proof = [bytes.fromhex(sibling) for sibling in json.loads(row['proof'])]
+        return {
+            'grievance_id': row['grievance_id'],
+            'audio_hash': row['audio_hash'],
+            'leaf': row['leaf'],
+            'root': row['batch_root'],
+            'index': row['leaf_index'],
+            'proof': proof,
+            'batch_size': row['size'],
+            'state': row['state'],
+            'tx_hash': row['tx_hash'],
+            'valid': verify_proof(row['leaf'], proof, row['batch_root'])
+        }
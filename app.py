@@ -1,29 +1,48 @@
 import os
-import requests
-import hashlib
-import random
+import math
+import time
 import datetime
-import threading
-from flask import Flask, request, render_template, redirect, url_for, jsonify, session
+from flask import Flask, request, render_template, redirect, url_for, jsonify, session, send_file, abort, g, Response
 from functools import wraps
-from twilio.twiml.voice_response import VoiceResponse, Gather
+from twilio.twiml.voice_response import VoiceResponse
 from twilio.rest import Client
 from dotenv import load_dotenv
 import google.generativeai as genai
-from blockchain import Blockchain
+from blockchain import Blockchain, verify_inclusion
+from storage import create_store, SORTABLE_COLUMNS
+from sessions import create_session_store
+from ticket_ids import create_ticket_id_allocator
+from models import Grievance, GrievanceStatus, AnchorState, parse_report, failed_analysis
+from analytics import AnalyticsRollup, DIMENSIONS as ANALYTICS_DIMENSIONS
+from jobs import JobQueue, Stage
+from recordings import create_recording_store
+from analysis import AnalysisScheduler
+from services import ServiceRegistry
+from ivr import IVRFlow
+from ratelimit import SharedTokenBucket
+from metrics import REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, EVENTS, QUEUE_DEPTH, IN_FLIGHT, timed
 
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY')
 prahari_chain = Blockchain()
-grievance_db = {}  # in-memory storage for grievances
+grievance_store = create_store()  # persistent, indexed grievance storage
+recording_store = create_recording_store()  # content-addressed audio, one file per unique recording
+RECORDING_CACHE_SECONDS = int(os.getenv('RECORDING_CACHE_SECONDS', str(365 * 24 * 3600)))
+call_sessions = create_session_store()  # in-progress IVR answers, evicted by TTL/LRU
+# unique ticket ids, reserved in blocks per process and checked against store and chain
+ticket_ids = create_ticket_id_allocator(
+    is_taken=lambda g_id: grievance_store.exists(g_id) or prahari_chain.has_grievance(g_id)
+)
+# counters are maintained by triggers on the grievances table
+analytics_rollup = AnalyticsRollup(os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'))
+
+GRIEVANCES_PER_PAGE = 20
 
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME')
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD')
 
-# initialize Twilio client for SMS
-twilio_client = Client(os.getenv('account_sid'), os.getenv('auth_token'))
 TWILIO_NUMBER = os.getenv('twilio_number')
 my_mobile_number=os.getenv('my_mobile_number')
 
@@ -35,211 +54,168 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY not found in .env file")
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # label by url rule rather than path so ticket ids don't each create a series
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    started = g.get('request_started')
+    if started is not None:
+        HTTP_LATENCY.observe(time.perf_counter() - started, route=route)
+    HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    return response
 
-genai.configure(api_key=GOOGLE_API_KEY)
-gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+def create_gemini_model():
+    genai.configure(api_key=GOOGLE_API_KEY)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+# external clients are built on first use and health-checked in the background
+services = ServiceRegistry(check_interval=float(os.getenv('SERVICE_CHECK_INTERVAL', '60')))
+services.register(
+    'twilio',
+    lambda: Client(os.getenv('account_sid'), os.getenv('auth_token')),
+    check=lambda client: client.api.accounts(os.getenv('account_sid')).fetch(),
+    enabled=bool(os.getenv('account_sid') and os.getenv('auth_token'))
+)
+services.register(
+    'gemini',
+    create_gemini_model,
+    check=lambda model: genai.get_model(f'models/{GEMINI_MODEL}'),
+    enabled=bool(GOOGLE_API_KEY)
+)
+services.register(
+    'ethereum',
+    prahari_chain.connect_ethereum,
+    check=lambda w3: w3.is_connected(),
+    enabled=prahari_chain.eth_configured
+)
+services.start_health_checks()
+
+GREETINGS = (
+    "Namaste. Aap ka swagat hai Prahari mein.",
+    "Namaste. Prahari helpline mein aapka swagat hai.",
+    "Namaste. Prahari mein aapka swagat hai.",
+)
 
 def get_greeting():
     """Returns time-appropriate greeting in Hinglish"""
     hour = datetime.datetime.now().hour
     if hour < 12:
-        return "Namaste. Aap ka swagat hai Prahari mein."
+        return GREETINGS[0]
     elif hour < 18:
-        return "Namaste. Prahari helpline mein aapka swagat hai."
+        return GREETINGS[1]
     else:
-        return "Namaste. Prahari mein aapka swagat hai."
+        return GREETINGS[2]
+
+def save_call_answer(call_sid, field, value):
+    call_sessions.update(call_sid, **{field: value})
+
+# IVR call flow: /voice, /gather, /ask_<field> and /save_<field> serve precompiled TwiML
+ivr_flow = IVRFlow(GREETINGS, save_call_answer, greeting=get_greeting)
+ivr_flow.register(app)
+
+SMS_MESSAGES = {
+    'acknowledgment': "Grievance Registered. Your Tracking ID is {g_id}. Track at https://codi-interpressure-jacqui.ngrok-free.dev/verify_blockchain",
+    'resolution': "Your grievance (ID: {g_id}) has been resolved. Thank you for using PRAHARI.",
+}
+
+def queue_sms(kind, grievance_id):
+    """Queues an SMS in the persistent outbox, at most once per grievance and message type"""
+    if not services.enabled('twilio'):
+        print(f"⚠️ Twilio not configured, not sending {kind} SMS for {grievance_id}")
+        EVENTS.inc(event='sms_skipped')
+        return
+    if not sms_outbox.submit({'kind': kind, 'g_id': grievance_id, 'to': my_mobile_number},
+                             dedup_key=f"{grievance_id}:{kind}"):
+        EVENTS.inc(event='sms_duplicate')
 
 def send_sms_acknowledgment(phone_number, grievance_id):
-    """Sends SMS confirmation after grievance registration"""
-    try:
-        message = twilio_client.messages.create(
-            body=f"Grievance Registered. Your Tracking ID is {grievance_id}. Track at https://codi-interpressure-jacqui.ngrok-free.dev/verify_blockchain",
-            from_=TWILIO_NUMBER,
-            to=my_mobile_number
-        )
-        print(f"✅ SMS sent to {my_mobile_number}: {message.sid}")
-    except Exception as e:
-        print(f"❌ SMS failed: {str(e)}")
+    """Queues SMS confirmation after grievance registration"""
+    queue_sms('acknowledgment', grievance_id)
 
 def send_resolution_sms(phone_number, grievance_id):
-    """Sends SMS when grievance is resolved"""
-    try:
-        message = twilio_client.messages.create(
-            body=f"Your grievance (ID: {grievance_id}) has been resolved. Thank you for using PRAHARI.",
+    """Queues SMS when grievance is resolved"""
+    queue_sms('resolution', grievance_id)
+
+def send_queued_sms(job):
+    """Outbox stage: sends one SMS within the account's messaging rate; raises (and
+    retries, then fails) when Twilio is unavailable rather than finishing unsent"""
+    client = services.get('twilio')
+    if not sms_rate_limit.acquire(timeout=30):
+        raise RuntimeError("Timed out waiting for SMS rate limit")
+    with timed('sms_send'):
+        message = client.messages.create(
+            body=SMS_MESSAGES[job['kind']].format(g_id=job['g_id']),
             from_=TWILIO_NUMBER,
-            to=my_mobile_number
+            to=job['to']
         )
-        print(f"✅ Resolution SMS sent to {my_mobile_number}: {message.sid}")
-    except Exception as e:
-        print(f"❌ Resolution SMS failed: {str(e)}")
+    EVENTS.inc(event=f"sms_{job['kind']}_sent")
+    return {'sid': message.sid}
+
+def sms_failed(job, error):
+    print(f"❌ {job['kind'].capitalize()} SMS for {job['g_id']} failed: {str(error)}")
+
+# shared through SQLite, so all worker processes together stay within the account's rate
+sms_rate_limit = SharedTokenBucket(
+    os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'), 'sms',
+    rate=float(os.getenv('SMS_PER_SECOND', '1'))
+)
+sms_outbox = JobQueue(
+    os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'),
+    'sms',
+    stages=[Stage('send', send_queued_sms, max_attempts=6)],
+    on_failure=sms_failed,
+    workers=int(os.getenv('SMS_WORKERS', '2'))
+)
+sms_outbox.start()
 
 def analyze_audio_with_ai(file_path):
-    """Uses Gemini AI to transcribe and categorize audio complaints"""
-    try:
-        if not os.path.exists(file_path):
-            return f"Error: Audio file not found"
-        
-        audio_file = genai.upload_file(file_path)
-        
-        prompt = """Listen to this audio grievance complaint and analyze it. Return a summary in this format:
-        
-        Transcription: [What the person said]
-        Category: [Water/Road/Electricity/Medical/Corruption/Other]
-        Summary: [1 sentence summary of the complaint]
-        Sentiment: [Urgent/Calm/Angry]
-        Priority: [High/Medium/Low]"""
-        
-        gemini_response = gemini_model.generate_content([prompt, audio_file])
-        return gemini_response.text
-        
-    except Exception as e:
-        return f"AI Analysis Failed: {str(e)}"
-
-@app.route("/voice", methods=['GET', 'POST'])
-def voice():
-    resp = VoiceResponse()
-    greeting = get_greeting()
-    full_message = f"{greeting} Apni shikayat register karne ke liye 1 dabayein. Status check karne ke liye 2 dabayein."
-    
-    gather = Gather(num_digits=1, action='/gather', method='POST')
-    gather.say(full_message, voice='Polly.Aditi', language='en-IN')
-    resp.append(gather)
-    resp.redirect('/voice')
-    return str(resp)
-
-@app.route("/gather", methods=['GET', 'POST'])
-def gather():
-    digit = request.values.get('Digits', None)
-    resp = VoiceResponse()
-
-    if digit == '1':
-        resp.redirect('/ask_state')
-    elif digit == '2':
-        gather = Gather(num_digits=6, action='/status_result', method='POST')
-        gather.say("Apna 6 digit tracking annkh enter karein.", voice='Polly.Aditi', language='en-IN')
-        resp.append(gather)
-    else:
-        resp.say("Galat option. Dobara try karein.", voice='Polly.Aditi', language='en-IN')
-        resp.redirect('/voice')
-
-    return str(resp)
-
-@app.route("/ask_state", methods=['GET', 'POST'])
-def ask_state():
-    resp = VoiceResponse()
-    gather = Gather(input='speech', timeout=5, action='/save_state', method='POST', language='en-IN', speechTimeout='auto')
-    gather.say("Pehle batayein, aap kis state se bol rahe hain?", voice='Polly.Aditi', language='en-IN')
-    resp.append(gather)
-    resp.say("Koi jawab nahi mila. Dobara try karein.", voice='Polly.Aditi', language='en-IN')
-    resp.redirect('/ask_state')
-    return str(resp)
-
-@app.route("/save_state", methods=['GET', 'POST'])
-def save_state():
-    state = request.values.get('SpeechResult', None)
-    if not state:
-        return redirect('/ask_state')
-    
-    session_id = request.values.get('CallSid')
-    if session_id not in grievance_db:
-        grievance_db[session_id] = {}
-    grievance_db[session_id]['state'] = state
-    
-    resp = VoiceResponse()
-    gather = Gather(input='speech', timeout=5, action='/save_city', method='POST', language='en-IN', speechTimeout='auto')
-    gather.say("Theek hai. Ab batayein aapka shehar ya Jilla kya hai?", voice='Polly.Aditi', language='en-IN')
-    resp.append(gather)
-    resp.say("Koi jawab nahi mila. Dobara try karein.", voice='Polly.Aditi', language='en-IN')
-    resp.redirect('/ask_city')
-    return str(resp)
-
-@app.route("/ask_city", methods=['GET', 'POST'])
-def ask_city():
-    resp = VoiceResponse()
-    gather = Gather(input='speech', timeout=5, action='/save_city', method='POST', language='en-IN', speechTimeout='auto')
-    gather.say("Aapka shehar ya Jilla kya hai?", voice='Polly.Aditi', language='en-IN')
-    resp.append(gather)
-    resp.say("Koi jawab nahi mila. Dobara try karein.", voice='Polly.Aditi', language='en-IN')
-    resp.redirect('/ask_city')
-    return str(resp)
-
-@app.route("/save_city", methods=['GET', 'POST'])
-def save_city():
-    city = request.values.get('SpeechResult', None)
-    if not city:
-        return redirect('/ask_city')
+    """Uses Gemini AI to transcribe and categorize audio complaints, raises on failure so the job can retry"""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError("Audio file not found")
     
-    session_id = request.values.get('CallSid')
-    if session_id in grievance_db:
-        grievance_db[session_id]['city'] = city
+    gemini_model = services.get('gemini')
+    audio_file = genai.upload_file(file_path)
     
-    resp = VoiceResponse()
-    gather = Gather(input='speech', timeout=5, action='/save_location', method='POST', language='en-IN', speechTimeout='auto')
-    gather.say("Aur aapka area ya mohalla kya hai?", voice='Polly.Aditi', language='en-IN')
-    resp.append(gather)
-    resp.say("Koi jawab nahi mila. Dobara try karein.", voice='Polly.Aditi', language='en-IN')
-    resp.redirect('/ask_location')
-    return str(resp)
-
-@app.route("/ask_location", methods=['GET', 'POST'])
-def ask_location():
-    resp = VoiceResponse()
-    gather = Gather(input='speech', timeout=5, action='/save_location', method='POST', language='en-IN', speechTimeout='auto')
-    gather.say("Aapka area ya mohalla kya hai?", voice='Polly.Aditi', language='en-IN')
-    resp.append(gather)
-    resp.say("Koi jawab nahi mila. Dobara try karein.", voice='Polly.Aditi', language='en-IN')
-    resp.redirect('/ask_location')
-    return str(resp)
-
-@app.route("/save_location", methods=['GET', 'POST'])
-def save_location():
-    location = request.values.get('SpeechResult', None)
-    if not location:
-        return redirect('/ask_location')
+    prompt = """Listen to this audio grievance complaint and analyze it. Return a summary in this format:
     
-    session_id = request.values.get('CallSid')
-    if session_id in grievance_db:
-        grievance_db[session_id]['location'] = location
+    Transcription: [What the person said]
+    Category: [Water/Road/Electricity/Medical/Corruption/Other]
+    Summary: [1 sentence summary of the complaint]
+    Sentiment: [Urgent/Calm/Angry]
+    Priority: [High/Medium/Low]"""
     
-    resp = VoiceResponse()
-    resp.say("Dhanyavaad. Ab beep ke baad apni shikayat clearly bolein.", voice='Polly.Aditi', language='en-IN')
-    resp.record(maxLength=60, finishOnKey='#', playBeep=True, action='/handle_recording')
-    return str(resp)
+    gemini_response = gemini_model.generate_content([prompt, audio_file])
+    return gemini_response.text
 
 @app.route("/handle_recording", methods=['GET', 'POST'])
 def handle_recording():
     """Handles audio recording from Twilio and generates ticket ID"""
     recording_url = request.values.get("RecordingUrl")
     caller_number = request.values.get("From")  # get caller's phone number
-    g_id = str(random.randint(100000, 999999))  # generate 6-digit ticket
-    ai_analysis = "🔄 AI Analysis in Progress..."
-    file_hash = "Pending"
-    local_audio_path = None
+    g_id = ticket_ids.allocate()
 
     session_id = request.values.get('CallSid')
-    location_data = grievance_db.get(session_id, {})
-    state = location_data.get('state', 'Not provided')
-    city = location_data.get('city', 'Not provided')
-    location = location_data.get('location', 'Not provided')
-    
-    # clean up temporary session data
-    if session_id in grievance_db:
-        del grievance_db[session_id]
+    # fetch and clean up temporary session data
+    location_data = call_sessions.pop(session_id) if session_id else {}
+    state = location_data.get('state') or 'Not provided'
+    city = location_data.get('city') or 'Not provided'
+    location = location_data.get('location') or 'Not provided'
     
-    grievance_db[g_id] = {
-        'url': 'pending',
-        'hash': 'pending',
-        'status': 'Pending',
-        'ai_report': ai_analysis,
-        'state': state,
-        'city': city,
-        'location': location,
-        'phone': caller_number,
-        'timestamp': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
+    grievance = Grievance.new(
+        g_id,
+        state=state,
+        city=city,
+        location=location,
+        phone=caller_number
+    )
+    grievance_store.insert(grievance)
     
     resp = VoiceResponse()
     formatted_id = " ".join(g_id)
@@ -252,79 +228,118 @@ def handle_recording():
         send_sms_acknowledgment(caller_number, g_id)
     
     if recording_url:
-        thread = threading.Thread(target=process_audio_async, args=(recording_url, g_id))
-        thread.daemon = True
-        thread.start()
+        audio_jobs.submit({'recording_url': recording_url, 'g_id': g_id}, dedup_key=g_id)
     
     return str(resp)
 
-def process_audio_async(recording_url, g_id):
-    """Background task to download audio, generate hash, and run AI analysis"""
-    try:
-        os.makedirs('static/recordings', exist_ok=True)
-        saved_filename = f"static/recordings/{g_id}.wav"
-        temp_filename = f"temp_{g_id}.wav"
-        
-        account_sid = os.getenv('account_sid')
-        auth_token = os.getenv('auth_token')
-        
-        # download audio from Twilio
-        response = requests.get(recording_url + ".wav", auth=(account_sid, auth_token), timeout=30)
-        
-        if response.status_code == 200 and len(response.content) > 1000:
-            with open(temp_filename, 'wb') as f:
-                f.write(response.content)
-            
-            # generate SHA-256 hash for blockchain
-            with open(temp_filename, "rb") as f:
-                file_hash = hashlib.sha256(f.read()).hexdigest()
-            
-            # run AI analysis
-            ai_analysis = analyze_audio_with_ai(temp_filename)
-            
-            # save permanent copy
-            with open(temp_filename, 'rb') as src:
-                with open(saved_filename, 'wb') as dst:
-                    dst.write(src.read())
-            
-            local_audio_path = f"recordings/{g_id}.wav"
-            
-            if os.path.exists(temp_filename):
-                os.remove(temp_filename)
-            
-            if g_id in grievance_db:
-                grievance_db[g_id]['url'] = local_audio_path
-                grievance_db[g_id]['hash'] = file_hash
-                grievance_db[g_id]['ai_report'] = ai_analysis
-                
-                # register on blockchain
-                blockchain_result = prahari_chain.add_data(g_id, file_hash, 'Pending')
-                
-                # maintain local chain as backup
-                previous_block = prahari_chain.get_last_block()
-                if previous_block:
-                    previous_hash = prahari_chain.hash(previous_block)
-                    prahari_chain.create_block(proof=len(grievance_db), previous_hash=previous_hash)
-                
-                print(f"✅ Background processing complete for {g_id}")
-        else:
-            if g_id in grievance_db:
-                grievance_db[g_id]['ai_report'] = "❌ Audio download failed"
-                grievance_db[g_id]['url'] = "error"
-                
-    except Exception as e:
-        print(f"❌ Background processing error for {g_id}: {str(e)}")
-        if g_id in grievance_db:
-            grievance_db[g_id]['ai_report'] = f"❌ Processing error: {str(e)}"
-            grievance_db[g_id]['url'] = "error"
+def fetch_recording(job):
+    """Job stage: streams the Twilio recording into the content-addressed store, hashing it in the same pass"""
+    g_id = job['g_id']
+    auth = (os.getenv('account_sid'), os.getenv('auth_token'))
+    
+    # download audio from Twilio and generate SHA-256 hash for blockchain
+    file_hash, saved_filename = recording_store.save(job['recording_url'] + ".wav", g_id, auth=auth)
+    
+    grievance_store.update(g_id, url=recording_store.url_for(file_hash), hash=file_hash)
+    return {'file_hash': file_hash, 'audio_path': saved_filename}
+
+def analyze_recording(job):
+    """Job stage: runs AI analysis on the saved recording"""
+    ai_analysis = analysis_scheduler.analyze(job['file_hash'], job['audio_path'])
+    analysis_fields = parse_report(ai_analysis)
+    grievance_store.update(job['g_id'], **analysis_fields)
+    return {'ai_report': ai_analysis}
+
+def analysis_exhausted(job, error):
+    """Keeps the ticket moving to the anchor stage when the AI never succeeded"""
+    ai_analysis = f"AI Analysis Failed: {str(error)}"
+    grievance_store.update(job['g_id'], **failed_analysis(ai_analysis))
+    return {'ai_report': ai_analysis}
+
+def anchor_recording(job):
+    """Job stage: registers the audio hash on the blockchain"""
+    g_id = job['g_id']
+    if not grievance_store.exists(g_id):
+        return
+    
+    # connects on first use (cold start, or after an RPC outage); raising retries the stage
+    if prahari_chain.eth_configured:
+        services.get('ethereum')
+    # register on blockchain; the local backup chain seals it into the next block
+    prahari_chain.add_data(g_id, job['file_hash'], 'Pending')
+    EVENTS.inc(event='recording_processed')
+
+def record_anchor_update(grievance_ids, info):
+    """Stores the on-chain state of the transaction anchoring these grievances"""
+    fields = {'anchor': AnchorState(info['state'])}
+    if info.get('tx_hash'):
+        fields['tx_hash'] = info['tx_hash']
+    if info.get('block_number') is not None:
+        fields['tx_block'] = info['block_number']
+    for g_id in grievance_ids:
+        grievance_store.update(g_id, **fields)
+
+prahari_chain.on_anchor_update = record_anchor_update
+
+def audio_job_failed(job, error):
+    """Marks the ticket once a required stage has exhausted its retries"""
+    if 'file_hash' not in job:
+        ai_report = "❌ Audio download failed"
+    else:
+        ai_report = f"❌ Processing error: {str(error)}"
+    grievance_store.update(job['g_id'], url="error", **failed_analysis(ai_report))
+
+# the Gemini quota is per API key, so every worker process draws from one shared bucket
+gemini_rate_limit = SharedTokenBucket(
+    os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'), 'gemini',
+    rate=float(os.getenv('GEMINI_RATE_PER_MINUTE', '30')) / 60.0,
+    capacity=max(1, int(os.getenv('GEMINI_MAX_CONCURRENCY', '2')))
+)
+analysis_scheduler = AnalysisScheduler(
+    analyze_audio_with_ai,
+    os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'),
+    gemini_rate_limit,
+    concurrency=int(os.getenv('GEMINI_MAX_CONCURRENCY', '2'))
+)
+
+audio_jobs = JobQueue(
+    os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'),
+    'audio',
+    stages=[
+        Stage('download', fetch_recording, max_attempts=5),
+        # the only retry layer for Gemini calls: each attempt makes one call
+        Stage('ai', analyze_recording, max_attempts=4, on_exhausted=analysis_exhausted),
+        # enough attempts (roughly 10 minutes of backoff) to ride out an RPC outage
+        Stage('anchor', anchor_recording, max_attempts=10),
+    ],
+    on_failure=audio_job_failed,
+    workers=int(os.getenv('JOB_WORKERS', '4'))
+)
+audio_jobs.start()
+
+@REGISTRY.on_scrape
+def collect_queue_metrics():
+    """Queue depths and in-flight counts, read only when /metrics is scraped"""
+    for queue in (audio_jobs, sms_outbox):
+        stats = queue.metrics()
+        QUEUE_DEPTH.set(stats['depth'], queue=stats['queue'])
+        IN_FLIGHT.set(stats['in_flight'], queue=stats['queue'])
+    QUEUE_DEPTH.set(prahari_chain.sealer.pending(), queue='block_sealer')
+    if prahari_chain.batcher:
+        QUEUE_DEPTH.set(prahari_chain.batcher.pending_count(), queue='anchor_batch')
+    if prahari_chain.tx_pipeline:
+        stats = prahari_chain.tx_pipeline.metrics()
+        QUEUE_DEPTH.set(stats['queued'], queue='transactions')
+        IN_FLIGHT.set(stats['in_flight'], queue='transactions')
 
 @app.route("/status_result", methods=['GET', 'POST'])
 def status_result():
     entered_id = request.values.get('Digits', None)
     resp = VoiceResponse()
 
-    if entered_id in grievance_db:
-        status = grievance_db[entered_id]['status']
+    grievance = grievance_store.get(entered_id) if entered_id else None
+    if grievance:
+        status = grievance.status
         resp.say(f"Aapki shikayat ka status hai {status}.", voice='Polly.Aditi', language='en-IN')
     else:
         resp.say("Yeh number nahi mila. Kripya dobara check karein.", voice='Polly.Aditi', language='en-IN')
@@ -357,19 +372,69 @@ def logout():
     session.clear()
     return redirect(url_for('login'))
 
+def get_dashboard_stats():
+    """Counts for the dashboard stats bar, served from the analytics counters"""
+    return analytics_rollup.summary()
+
+def grievance_page(status=None):
+    """Fetches one page of grievances using the page, per_page, sort, order and q arguments"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', GRIEVANCES_PER_PAGE, type=int), 1), 100)
+    sort = request.args.get('sort', 'created_at')
+    if sort not in SORTABLE_COLUMNS:
+        sort = 'created_at'
+    descending = request.args.get('order', 'desc') != 'asc'
+    query = request.args.get('q', '').strip()
+    
+    items, total = grievance_store.page(query or None, status, sort, descending, per_page, (page - 1) * per_page)
+    return {
+        'db': items,
+        'page': page,
+        'per_page': per_page,
+        'pages': max(1, math.ceil(total / per_page)),
+        'total': total,
+        'query': query
+    }
+
 @app.route("/admin")
 @app.route("/dashboard")
 @login_required
 def admin():
     chain_length = len(prahari_chain.chain) if hasattr(prahari_chain, 'chain') else 0
-    pending_db = {k: v for k, v in grievance_db.items() if v.get('status') == 'Pending'}
-    return render_template('admin.html', db=pending_db, chain_len=chain_length, view='dashboard', all_db=grievance_db)
+    listing = grievance_page(status=GrievanceStatus.PENDING)
+    return render_template('admin.html', chain_len=chain_length, view='dashboard', stats=get_dashboard_stats(), **listing)
 
 @app.route("/all_grievances")
 @login_required
 def all_grievances():
     chain_length = len(prahari_chain.chain) if hasattr(prahari_chain, 'chain') else 0
-    return render_template('admin.html', db=grievance_db, chain_len=chain_length, view='all', all_db=grievance_db)
+    listing = grievance_page()
+    return render_template('admin.html', chain_len=chain_length, view='all', stats=get_dashboard_stats(), **listing)
+
+@app.route("/api/grievances")
+@login_required
+def api_grievances():
+    """Paginated, sortable listing with full-text search; format=html returns the dashboard fragment"""
+    status = request.args.get('status') or None
+    if status:
+        try:
+            status = GrievanceStatus(status)
+        except ValueError:
+            return jsonify({'error': 'invalid status'}), 400
+    listing = grievance_page(status)
+    
+    if request.args.get('format') == 'html':
+        view = 'dashboard' if status is GrievanceStatus.PENDING else 'all'
+        return render_template('_grievance_list.html', view=view, **listing)
+    
+    return jsonify({
+        'items': [grievance.to_dict() for grievance in listing['db']],
+        'page': listing['page'],
+        'per_page': listing['per_page'],
+        'pages': listing['pages'],
+        'total': listing['total'],
+        'query': listing['query']
+    })
 
 @app.route("/analytics")
 @login_required
@@ -377,49 +442,46 @@ def analytics():
     """Generates analytics dashboard with category breakdown"""
     chain_length = len(prahari_chain.chain) if hasattr(prahari_chain, 'chain') else 0
     
-    total = len(grievance_db)
-    pending = sum(1 for v in grievance_db.values() if v.get('status') == 'Pending')
-    resolved = sum(1 for v in grievance_db.values() if v.get('status') == 'Resolved')
-    
-    # extract categories from AI reports
-    categories = {}
-    for v in grievance_db.values():
-        report = v.get('ai_report', '')
-        if 'Category:' in report:
-            cat_line = [line for line in report.split('\n') if 'Category:' in line]
-            if cat_line:
-                cat_text = cat_line[0].split('Category:')[1].strip()
-                if '[' in cat_text and ']' in cat_text:
-                    cat = cat_text.split('[')[1].split(']')[0].strip()
-                else:
-                    cat = cat_text.split()[0].strip() if cat_text else 'Unknown'
-                categories[cat] = categories.get(cat, 0) + 1
-        else:
-            categories['Unknown'] = categories.get('Unknown', 0) + 1
-    
-    analytics_data = {
-        'total': total,
-        'pending': pending,
-        'resolved': resolved,
-        'categories': categories
-    }
+    analytics_data = get_dashboard_stats()
     
-    return render_template('admin.html', db=grievance_db, chain_len=chain_length, view='analytics', analytics=analytics_data, all_db=grievance_db)
+    return render_template('admin.html', db=[], query='', chain_len=chain_length, view='analytics', analytics=analytics_data, stats=analytics_data)
+
+@app.route("/api/analytics")
+@login_required
+def api_analytics():
+    """Counters plus hour/day trend series by state, city, category and priority"""
+    granularity = request.args.get('granularity', 'day')
+    dimensions = request.args.getlist('dimension') or list(ANALYTICS_DIMENSIONS)
+    since = request.args.get('since', type=float)
+    until = request.args.get('until', type=float)
+    try:
+        series = {dimension: analytics_rollup.series(dimension, granularity, since, until) for dimension in dimensions}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'summary': analytics_rollup.summary(),
+        'granularity': granularity,
+        'series': series
+    })
 
 @app.route("/update_status", methods=['POST'])
 @login_required
 def update_status():
     """Updates grievance status and sends SMS if resolved"""
     g_id = request.form.get('g_id')
-    new_status = request.form.get('new_status')
+    try:
+        new_status = GrievanceStatus(request.form.get('new_status'))
+    except ValueError:
+        return jsonify({'error': 'invalid status'}), 400
     
-    if g_id in grievance_db:
-        old_status = grievance_db[g_id]['status']
-        grievance_db[g_id]['status'] = new_status
+    grievance = grievance_store.get(g_id) if g_id else None
+    if grievance:
+        old_status = grievance.status
+        grievance_store.update(g_id, status=new_status)
         
         # send SMS if status changed to Resolved
-        if new_status == 'Resolved' and old_status != 'Resolved':
-            phone_number = grievance_db[g_id].get('phone')
+        if new_status is GrievanceStatus.RESOLVED and old_status is not GrievanceStatus.RESOLVED:
+            phone_number = grievance.phone
             if phone_number:
                 send_resolution_sms(phone_number, g_id)
     
@@ -434,8 +496,9 @@ def verify_blockchain():
     if search_id:
         search_result = prahari_chain.find_grievance_in_chain(search_id)
         if search_result.get('found'):
-            if search_id in grievance_db:
-                search_result['grievance'] = grievance_db[search_id]
+            grievance = grievance_store.get(search_id)
+            if grievance:
+                search_result['grievance'] = grievance
     
     return render_template('verify.html', report=report, search_id=search_id, search_result=search_result)
 
@@ -444,36 +507,112 @@ def api_verify():
     report = prahari_chain.get_verification_report()
     return jsonify(report)
 
+@app.route("/api/audit", methods=['POST'])
+@login_required
+def audit_chain():
+    """Full parallel re-verification of the local chain"""
+    return jsonify(prahari_chain.audit_chain(workers=int(os.getenv('AUDIT_WORKERS', '0')) or None))
+
 @app.route("/verify_grievance/<grievance_id>")
 def verify_grievance(grievance_id):
     result = prahari_chain.find_grievance_in_chain(grievance_id)
     return jsonify(result)
 
+@app.route("/api/proof/<grievance_id>")
+def grievance_proof(grievance_id):
+    """Local-chain inclusion proof: the block header plus Merkle siblings, checked before it is served"""
+    proof = prahari_chain.inclusion_proof(grievance_id)
+    if proof is None:
+        return jsonify({'found': False}), 404
+    proof['verified'] = verify_inclusion(proof)
+    return jsonify(proof)
+
+@app.route("/recordings/<g_id>")
+@login_required
+def recording_audio(g_id):
+    """Streams a ticket's recording with Range support; the content hash is the ETag"""
+    grievance = grievance_store.get(g_id)
+    if not grievance or grievance.url in ('pending', 'error'):
+        abort(404)
+    file_hash = recording_store.hash_for(g_id)
+    if file_hash:
+        path = recording_store.path_for(file_hash)
+    else:
+        # recordings saved before the content-addressed store
+        file_hash, path = grievance.hash, os.path.join(app.static_folder, grievance.url)
+    if not os.path.exists(path):
+        abort(404)
+    response = send_file(path, mimetype='audio/wav', conditional=True, etag=file_hash,
+                         max_age=RECORDING_CACHE_SECONDS)
+    # content never changes for a given hash, so browsers can skip revalidation
+    response.cache_control.private = True
+    response.cache_control.public = False
+    response.cache_control.immutable = True
+    return response
+
 @app.route("/api/check_analysis/<g_id>")
 def check_analysis(g_id):
-    if g_id in grievance_db:
-        grievance = grievance_db[g_id]
-        is_pending = '🔄' in grievance['ai_report'] or 'Progress' in grievance['ai_report']
+    grievance = grievance_store.get(g_id)
+    if grievance:
         return jsonify({
             'status': 'found',
-            'pending': is_pending,
-            'ai_report': grievance['ai_report'],
-            'hash': grievance['hash'],
-            'url': grievance['url']
+            'pending': grievance.analysis_pending,
+            'analysis': grievance.analysis.value,
+            'ai_report': grievance.ai_report,
+            'category': grievance.category,
+            'priority': grievance.priority,
+            'sentiment': grievance.sentiment,
+            'summary': grievance.summary,
+            'transcription': grievance.transcription,
+            'hash': grievance.hash,
+            'url': grievance.url,
+            'anchor': grievance.anchor.value,
+            'tx_hash': grievance.tx_hash,
+            'tx_block': grievance.tx_block
         })
     return jsonify({'status': 'not_found'}), 404
 
+@app.route("/health")
+def health():
+    """Background connectivity state of the external services"""
+    states = services.health()
+    if 'logged_in' not in session:
+        # error details can reveal configuration; only admins see them
+        for state in states.values():
+            state.pop('error')
+    degraded = any(state['state'] == 'down' for state in states.values())
+    return jsonify({'status': 'degraded' if degraded else 'ok', 'services': states})
+
+@app.route("/api/ivr")
+@login_required
+def ivr_timings():
+    return jsonify(ivr_flow.timings())
+
+@app.route("/api/jobs")
+@login_required
+def job_metrics():
+    metrics = audio_jobs.metrics()
+    metrics['sms'] = sms_outbox.metrics()
+    if prahari_chain.tx_pipeline:
+        metrics['transactions'] = prahari_chain.tx_pipeline.metrics()
+    return jsonify(metrics)
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Latency histograms, counters and queue gauges in Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route("/diagnostic")
 def diagnostic():
     import os
     return jsonify({
         'status': 'ok',
-        'grievances_count': len(grievance_db),
+        'grievances_count': grievance_store.count(),
         'blockchain_length': len(prahari_chain.chain) if hasattr(prahari_chain, 'chain') else 0,
         'script_exists': os.path.exists('static/script.js'),
         'script_size': os.path.getsize('static/script.js') if os.path.exists('static/script.js') else 0,
-        'recordings_exist': os.path.exists('static/recordings'),
-        'recordings_count': len(os.listdir('static/recordings')) if os.path.exists('static/recordings') else 0
+        'recordings_exist': os.path.exists(recording_store.root),
+        'recordings': recording_store.stats()
     })
 
 if __name__ == "__main__":
@@ -0,0 +1,388 @@
+"""End-to-end load test of the IVR call pipeline, run entirely offline.
+
+Drives /voice -> /gather -> /save_* -> /handle_recording for many concurrent
+simulated calls through Flask's test client, with in-process stand-ins for
+Twilio (a local HTTP server for recordings, a fake SMS client), Gemini (a
+canned report after a configurable delay) and an in-memory EVM running
+GrievanceRegistry. Reports throughput, p50/p99 latency per webhook and time
+from ticket issue to anchoring (confirmation on the EVM, or sealing into a
+local block with --local-only).
+
+    pip install -r requirements-bench.txt
+    python benchmark.py --calls 2000 --concurrency 64
+    python benchmark.py --calls 2000 --local-only        # no EVM, time to local sealing
+    python benchmark.py --contract-artifact build/GrievanceRegistry.json   # e.g. a solc build
+    python benchmark.py --compile                        # compile the .sol with py-solc-x (downloads solc)
+    python benchmark.py --max-p99-ms 50 --max-anchor-p99 5 --min-throughput 100 --max-errors 0
+
+By default the registry is deployed from the committed artifact
+contracts/GrievanceRegistry.artifact.json, so the run needs no compiler or
+network. Its bytecode is built from contracts/GrievanceRegistry.vy, a Vyper
+build of the contract with the same ABI, events and revert reasons; rebuild it
+with `vyper -f bytecode contracts/GrievanceRegistry.vy`. An artifact passed
+with --contract-artifact needs 'abi' and the bytecode: 'bin', or 'bytecode' as
+in a Hardhat or Foundry build artifact (contracts/GrievanceRegistry.json is
+ABI-only). When any budget is exceeded the run exits with status 1, so it can
+gate CI.
+
+Everything is written to a temporary directory; the real database, chain
+and recordings are never touched.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTRACT_PATH = os.path.join(REPO_DIR, 'contracts', 'GrievanceRegistry.sol')
+ARTIFACT_PATH = os.path.join(REPO_DIR, 'contracts', 'GrievanceRegistry.artifact.json')
+SOLC_VERSION = '0.8.20'
+
+FAKE_REPORT = """Transcription: Hamare mohalle mein teen din se paani nahi aa raha hai.
+Category: Water
+Summary: No water supply in the locality for three days.
+Sentiment: Angry
+Priority: High"""
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def fake_recording(number, size):
+    """A WAV header followed by bytes unique to this call, so every recording hashes differently"""
+    body = (f"call-{number}-".encode() * (size // 8 + 1))[:size]
+    header = (b'RIFF' + (36 + len(body)).to_bytes(4, 'little') + b'WAVEfmt '
+              + (16).to_bytes(4, 'little') + (1).to_bytes(2, 'little') + (1).to_bytes(2, 'little')
+              + (8000).to_bytes(4, 'little') + (16000).to_bytes(4, 'little')
+              + (2).to_bytes(2, 'little') + (16).to_bytes(2, 'little')
+              + b'data' + len(body).to_bytes(4, 'little'))
+    return header + body
+
+
+def start_recording_server(size):
+    """Serves /<n>.wav like Twilio's recording URLs, on a free local port"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            match = re.match(r'^/(\d+)\.wav$', self.path)
+            if not match:
+                self.send_error(404)
+                return
+            data = fake_recording(int(match.group(1)), size)
+            self.send_response(200)
+            self.send_header('Content-Type', 'audio/wav')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class FakeMessages:
+    def __init__(self):
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def create(self, body, from_, to):
+        with self._lock:
+            self.sent += 1
+            sid = f"SM{self.sent:032d}"
+        return type('Message', (), {'sid': sid})()
+
+
+class FakeTwilioClient:
+    def __init__(self):
+        self.messages = FakeMessages()
+
+
+class FakeGeminiModel:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, parts):
+        time.sleep(self.latency)
+        return type('Response', (), {'text': FAKE_REPORT})()
+
+
+def compile_registry():
+    """ABI and bytecode of GrievanceRegistry, using solc from PATH or one installed by py-solc-x"""
+    try:
+        import solcx
+    except ImportError as e:
+        sys.exit(f"❌ --compile needs py-solc-x (pip install -r requirements-bench.txt): {e}")
+    solcx.import_installed_solc()
+    if SOLC_VERSION not in [str(v) for v in solcx.get_installed_solc_versions()]:
+        print(f"⬇️ Installing solc {SOLC_VERSION}...")
+        solcx.install_solc(SOLC_VERSION)
+    compiled = solcx.compile_files([CONTRACT_PATH], output_values=['abi', 'bin'], solc_version=SOLC_VERSION)
+    return next(value for key, value in compiled.items() if key.endswith(':GrievanceRegistry'))
+
+
+def deploy_registry(artifact_path=ARTIFACT_PATH, compile_contract=False):
+    """Deploys GrievanceRegistry on an in-memory EVM.
+    Returns (provider, contract_address, private_key of a funded account)."""
+    try:
+        from eth_tester import EthereumTester
+        from web3 import Web3, EthereumTesterProvider
+    except ImportError as e:
+        sys.exit(f"❌ The EVM run needs eth-tester[py-evm] (pip install -r requirements-bench.txt, "
+                 f"or pass --local-only): {e}")
+
+    if not compile_contract:
+        with open(artifact_path) as f:
+            interface = json.load(f)
+        bytecode = interface.get('bin') or interface.get('bytecode')
+        if isinstance(bytecode, dict):
+            bytecode = bytecode.get('object')
+        if not bytecode or 'abi' not in interface:
+            sys.exit(f"❌ {artifact_path} needs both 'abi' and the contract bytecode ('bin' or 'bytecode'). "
+                     f"contracts/GrievanceRegistry.json is ABI-only: omit --contract-artifact to use "
+                     f"the committed build, or pass a Hardhat/Foundry build artifact.")
+    else:
+        interface = compile_registry()
+        bytecode = interface['bin']
+
+    provider = EthereumTesterProvider(EthereumTester())
+    w3 = Web3(provider)
+    funder = w3.eth.accounts[0]
+    account = w3.eth.account.create()
+    w3.eth.send_transaction({'from': funder, 'to': account.address, 'value': w3.to_wei(100, 'ether')})
+
+    contract = w3.eth.contract(abi=interface['abi'], bytecode=bytecode)
+    tx_hash = contract.constructor().transact({'from': funder})
+    address = w3.eth.wait_for_transaction_receipt(tx_hash)['contractAddress']
+    print(f"⛓️ GrievanceRegistry deployed at {address}")
+    return provider, address, account.key.hex()
+
+
+def configure_environment(args, workdir):
+    """Points every store at the scratch directory and lifts rate limits that would cap the run"""
+    os.environ.update({
+        'GRIEVANCE_DB_PATH': os.path.join(workdir, 'prahari.db'),
+        'CHAIN_LOG_DIR': os.path.join(workdir, 'chain_data'),
+        'RECORDINGS_DIR': os.path.join(workdir, 'recordings'),
+        'SECRET_KEY': 'benchmark',
+        'account_sid': 'ACbenchmark',
+        'auth_token': 'benchmark',
+        'twilio_number': '+10000000000',
+        'my_mobile_number': '+10000000001',
+        'GOOGLE_API_KEY': 'benchmark',
+        'JOB_WORKERS': str(args.job_workers),
+        'GEMINI_MAX_CONCURRENCY': str(args.gemini_concurrency),
+        'GEMINI_RATE_PER_MINUTE': '1000000',
+        'SMS_PER_SECOND': '1000',
+        'SERVICE_CHECK_INTERVAL': '3600',
+        'ETH_CONFIRMATIONS': '1',
+        'ETH_RECEIPT_POLL_INTERVAL': '0.2',
+        'ETH_ANCHOR_MODE': args.anchor_mode,
+        'ETH_BATCH_INTERVAL': '1',
+    })
+    # unset values would otherwise be filled from a developer's .env by load_dotenv
+    for key in ('ETH_RPC_URL', 'CONTRACT_ADDRESS', 'ETH_PRIVATE_KEY'):
+        os.environ[key] = ''
+
+
+class Benchmark:
+    def __init__(self, app_module, args, recording_base):
+        self.app_module = app_module
+        self.args = args
+        self.recording_base = recording_base
+        self.evm = not args.local_only
+        self.latencies = {}
+        self.issued = {}
+        self.anchored = {}
+        self.errors = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app_module.app.test_client()
+        return client
+
+    def _post(self, route, data):
+        started = time.perf_counter()
+        response = self._client().post(route, data=data)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies.setdefault(route, []).append(elapsed)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{route} returned {response.status_code}")
+        return response.get_data(as_text=True)
+
+    def call(self, number):
+        """One simulated caller going through the whole IVR flow"""
+        call_sid = f"CA{number:032d}"
+        try:
+            self._post('/voice', {'CallSid': call_sid})
+            self._post('/gather', {'CallSid': call_sid, 'Digits': '1'})
+            for field, answer in (('state', 'Uttar Pradesh'), ('city', 'Lucknow'), ('location', 'Gomti Nagar')):
+                self._post(f'/save_{field}', {'CallSid': call_sid, 'SpeechResult': answer})
+            twiml = self._post('/handle_recording', {
+                'CallSid': call_sid,
+                'From': '+919000000000',
+                'RecordingUrl': f"{self.recording_base}/{number}",
+            })
+        except Exception as e:
+            with self._lock:
+                self.errors.append(str(e))
+            return
+        match = re.search(r'tracking number hai ([\d ]+)\.', twiml)
+        if match:
+            with self._lock:
+                self.issued[match.group(1).replace(' ', '')] = time.perf_counter()
+
+    def is_anchored(self, g_id):
+        if self.evm:
+            grievance = self.app_module.grievance_store.get(g_id)
+            return grievance is not None and grievance.anchor == self.app_module.AnchorState.CONFIRMED
+        return self.app_module.prahari_chain.has_grievance(g_id)
+
+    def wait_for_anchors(self, timeout):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            with self._lock:
+                waiting = [g_id for g_id in self.issued if g_id not in self.anchored]
+            if not waiting:
+                return
+            for g_id in waiting:
+                if self.is_anchored(g_id):
+                    self.anchored[g_id] = time.perf_counter() - self.issued[g_id]
+            time.sleep(0.05)
+
+    def run(self):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as pool:
+            list(pool.map(self.call, range(1, self.args.calls + 1)))
+        calls_done = time.perf_counter()
+        self.wait_for_anchors(self.args.anchor_timeout)
+        finished = time.perf_counter()
+        return calls_done - started, finished - started
+
+    def report(self, call_seconds, total_seconds):
+        """Prints the results and returns the measured values the budgets are checked against"""
+        completed = len(self.issued)
+        print()
+        print(f"📞 Calls: {completed}/{self.args.calls} completed, {len(self.errors)} failed, "
+              f"concurrency {self.args.concurrency}")
+        print(f"⚡ Webhook throughput: {completed / call_seconds:.1f} calls/s "
+              f"({sum(len(v) for v in self.latencies.values()) / call_seconds:.1f} requests/s)")
+        print()
+        print(f"{'route':<20}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for route, values in self.latencies.items():
+            print(f"{route:<20}{len(values):>8}{percentile(values, 50) * 1000:>10.2f}"
+                  f"{percentile(values, 99) * 1000:>10.2f}{max(values) * 1000:>10.2f}")
+        print()
+        anchored = list(self.anchored.values())
+        target = 'confirmed on the EVM' if self.evm else 'sealed into a local block'
+        stage = 'anchor on the EVM' if self.evm else 'local sealing'
+        print(f"⛓️ Tickets {target}: {len(anchored)}/{completed}")
+        if anchored:
+            print(f"   time to {stage} p50 {percentile(anchored, 50):.2f}s, p99 {percentile(anchored, 99):.2f}s, "
+                  f"max {max(anchored):.2f}s")
+            print(f"   end-to-end throughput: {len(anchored) / total_seconds:.1f} tickets/s")
+        if self.errors:
+            print(f"❌ First error: {self.errors[0]}")
+        return {
+            'throughput': completed / call_seconds,
+            'errors': self.args.calls - completed,
+            'p99_ms': {route: percentile(values, 99) * 1000 for route, values in self.latencies.items()},
+            'anchor_p99': percentile(anchored, 99) if anchored else None,
+            'unanchored': completed - len(anchored),
+        }
+
+
+def check_budgets(results, args):
+    """Returns a description of every budget the run exceeded"""
+    exceeded = []
+    if args.min_throughput is not None and results['throughput'] < args.min_throughput:
+        exceeded.append(f"throughput {results['throughput']:.1f} calls/s < {args.min_throughput}")
+    if args.max_errors is not None and results['errors'] > args.max_errors:
+        exceeded.append(f"failed calls {results['errors']} > {args.max_errors}")
+    if args.max_p99_ms is not None:
+        for route, p99 in results['p99_ms'].items():
+            if p99 > args.max_p99_ms:
+                exceeded.append(f"{route} p99 {p99:.2f}ms > {args.max_p99_ms}ms")
+    if args.max_anchor_p99 is not None:
+        if results['unanchored']:
+            exceeded.append(f"{results['unanchored']} ticket(s) not anchored within {args.anchor_timeout}s")
+        elif results['anchor_p99'] is not None and results['anchor_p99'] > args.max_anchor_p99:
+            exceeded.append(f"time to anchor p99 {results['anchor_p99']:.2f}s > {args.max_anchor_p99}s")
+    return exceeded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of the PRAHARI call pipeline")
+    parser.add_argument('--calls', type=int, default=1000, help="simulated calls to place")
+    parser.add_argument('--concurrency', type=int, default=32, help="calls in progress at once")
+    parser.add_argument('--job-workers', type=int, default=8, help="JOB_WORKERS for the audio pipeline")
+    parser.add_argument('--gemini-latency', type=float, default=0.2, help="seconds per fake Gemini call")
+    parser.add_argument('--gemini-concurrency', type=int, default=8, help="GEMINI_MAX_CONCURRENCY")
+    parser.add_argument('--recording-bytes', type=int, default=32000, help="size of each fake recording")
+    parser.add_argument('--anchor-timeout', type=float, default=300, help="seconds to wait for anchoring")
+    parser.add_argument('--local-only', action='store_true',
+                        help="skip the in-memory EVM and measure time to local sealing")
+    parser.add_argument('--contract-artifact', default=ARTIFACT_PATH,
+                        help="JSON with the contract's 'abi' and 'bin' (or 'bytecode') to deploy")
+    parser.add_argument('--compile', action='store_true',
+                        help="compile contracts/GrievanceRegistry.sol with py-solc-x instead of using an artifact")
+    parser.add_argument('--anchor-mode', choices=['single', 'batch'], default='single',
+                        help="ETH_ANCHOR_MODE of the EVM run")
+    budgets = parser.add_argument_group('budgets', "exit with status 1 when any of these is exceeded")
+    budgets.add_argument('--max-p99-ms', type=float, help="p99 latency of every webhook route, in ms")
+    budgets.add_argument('--max-anchor-p99', type=float,
+                         help="p99 seconds from ticket issue to anchoring; also fails if any ticket is not anchored")
+    budgets.add_argument('--min-throughput', type=float, help="completed calls per second")
+    budgets.add_argument('--max-errors', type=int, help="failed calls")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='prahari-bench-')
+    print(f"📁 Working directory: {workdir}")
+    configure_environment(args, workdir)
+    provider = None
+    if not args.local_only:
+        provider, address, private_key = deploy_registry(args.contract_artifact, args.compile)
+        os.environ.update({'ETH_RPC_URL': 'http://127.0.0.1:1', 'CONTRACT_ADDRESS': address,
+                           'ETH_PRIVATE_KEY': private_key})
+
+    import app as app_module
+
+    app_module.services.register('twilio', FakeTwilioClient)
+    app_module.services.register('gemini', lambda: FakeGeminiModel(args.gemini_latency))
+    # the fake model reads no file, so the upload step only has to hand the path back
+    app_module.genai.upload_file = lambda path: path
+    if provider is not None:
+        app_module.services.register('ethereum', lambda: app_module.prahari_chain.connect_ethereum(provider))
+        app_module.services.get('ethereum')
+
+    server = start_recording_server(args.recording_bytes)
+    benchmark = Benchmark(app_module, args, f"http://127.0.0.1:{server.server_port}")
+    call_seconds, total_seconds = benchmark.run()
+    results = benchmark.report(call_seconds, total_seconds)
+    server.shutdown()
+    server.server_close()
+
+    exceeded = check_budgets(results, args)
+    for problem in exceeded:
+        print(f"❌ Budget exceeded: {problem}")
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
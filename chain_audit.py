@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from chainlog import ChainLog
+from merkle import leaf_hash, merkle_root
+
+# a block's hash covers only its header; entries are committed to by merkle_root
+HEADER_FIELDS = ('index', 'timestamp', 'proof', 'previous_hash', 'merkle_root', 'size')
+
+
+def block_header(block):
+    return {field: block[field] for field in HEADER_FIELDS if field in block}
+
+
+def block_hash(block):
+    encoded_block = json.dumps(block_header(block), sort_keys=True).encode()
+    return hashlib.sha256(encoded_block).hexdigest()
+
+
+def grievance_entries(data):
+    """The grievance records of a block body, in leaf order"""
+    if not isinstance(data, list):
+        return []
+    return [entry for entry in data if isinstance(entry, dict) and 'grievance_id' in entry]
+
+
+def check_block(block, position, stored_hash, previous_hash):
+    """Returns why a sealed block fails verification, or None if it is intact"""
+    if block['index'] != position + 1:
+        return "index out of sequence"
+    if block['previous_hash'] != previous_hash:
+        return "previous_hash does not match the preceding block"
+    if block_hash(block) != stored_hash:
+        return "header does not match its sealed hash"
+    entries = grievance_entries(block['data'])
+    root = '0x' + merkle_root([leaf_hash(e['grievance_id'], e['audio_hash']) for e in entries]).hex() \
+        if entries else None
+    if block.get('merkle_root') != root or block.get('size') != len(entries):
+        return "entries do not match merkle_root"
+    return None
+
+
+def verify_segment(start, blocks, hashes, previous_hash):
+    """Verifies consecutive blocks from position `start`; returns (position, reason) of the
+    first failure or None. Runs in audit worker processes, so it only uses its arguments."""
+    for offset, block in enumerate(blocks):
+        reason = check_block(block, start + offset, hashes[offset], previous_hash)
+        if reason:
+            return start + offset, reason
+        previous_hash = hashes[offset]
+    return None
+
+
+def verify_range(directory, start, segments, offsets, hashes, previous_hash):
+    """Audit worker: opens the block log itself and verifies the blocks at the given
+    locations, so only positions and hashes are sent to the worker process"""
+    log = ChainLog(directory, cache_size=0)
+    log.restore(segments, offsets)
+    return verify_segment(start, log[0:len(log)], hashes, previous_hash)
+
+
+def _run_worker(tasks):
+    worker = subprocess.run([sys.executable, os.path.abspath(__file__)], input=json.dumps(tasks).encode(),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if worker.returncode:
+        raise RuntimeError(f"audit worker exited with {worker.returncode}: {worker.stderr.decode().strip()}")
+    return json.loads(worker.stdout)
+
+
+def audit_segments(tasks, workers=None):
+    """Runs verify_range over each (directory, start, segments, offsets, hashes, previous_hash)
+    task in up to `workers` child processes; returns the results in task order.
+
+    Workers are plain `python chain_audit.py` interpreters fed JSON on stdin, not
+    multiprocessing children, which would re-import the script that started the
+    server. This module imports neither the app nor web3, so they start quickly.
+    """
+    if not tasks:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    tasks = [[directory, start, list(segments), list(offsets), list(hashes), previous_hash]
+             for directory, start, segments, offsets, hashes, previous_hash in tasks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # tasks are dealt round-robin, so worker i holds tasks i, i + workers, ...
+        batches = list(pool.map(_run_worker, [tasks[i::workers] for i in range(workers)]))
+    results = [None] * len(tasks)
+    for i, batch in enumerate(batches):
+        results[i::workers] = [tuple(result) if result else None for result in batch]
+    return results
+
+
+if __name__ == '__main__':
+    # audit worker: a list of verify_range arguments in, a list of results out
+    json.dump([verify_range(*task) for task in json.load(sys.stdin)], sys.stdout)
@@ -0,0 +1,163 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import contextmanager
+
+RECORD_HEADER = struct.Struct('>I')
+
+
+class ChainLog(Sequence):
+    """Append-only, segmented on-disk log of local chain blocks.
+
+    Each block is a length-prefixed JSON record. Blocks are read back through
+    memory maps and a small decoded-block cache, so the log behaves like a
+    read-only list of blocks that never has to be loaded in full. Writers take
+    an exclusive file lock, so several processes can append to the same log.
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, cache_size=1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.cache_size = cache_size
+        # location of every block: segment number and byte offset of its record
+        self.segments = array('I')
+        self.offsets = array('Q')
+        self._maps = {}
+        self._cache = OrderedDict()
+        self._read_lock = threading.RLock()
+        self._lock_file = open(os.path.join(directory, 'chain.lock'), 'a+')
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f'segment-{segment:06d}.log')
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # bulk reads (audits, reports) bypass the cache so they do not evict hot blocks
+            with self._read_lock:
+                return [self._read(self.segments[i], self.offsets[i]) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('chain index out of range')
+        with self._read_lock:
+            block = self._cache.get(index)
+            if block is None:
+                block = self._read(self.segments[index], self.offsets[index])
+                self._cache[index] = block
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(index)
+            return block
+
+    def _map(self, segment, needed):
+        """Memory map of a segment covering at least `needed` bytes"""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < needed:
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def _record_length(self, segment, offset):
+        with self._read_lock:
+            return RECORD_HEADER.unpack_from(self._map(segment, offset + RECORD_HEADER.size), offset)[0]
+
+    def _read(self, segment, offset):
+        with self._read_lock:
+            length = self._record_length(segment, offset)
+            start = offset + RECORD_HEADER.size
+            return json.loads(self._map(segment, start + length)[start:start + length])
+
+    def end(self):
+        """Position just past the last known block: (segment, offset)"""
+        if not self.offsets:
+            return 1, 0
+        segment, offset = self.segments[-1], self.offsets[-1]
+        return segment, offset + RECORD_HEADER.size + self._record_length(segment, offset)
+
+    def has_tail(self):
+        """True if records were appended past the known end, e.g. by another process"""
+        segment, offset = self.end()
+        path = self._segment_path(segment)
+        return (os.path.exists(path) and os.path.getsize(path) > offset) or \
+            os.path.exists(self._segment_path(segment + 1))
+
+    def replay(self, truncate=False):
+        """Yields blocks appended past the known end and records their locations.
+
+        A record cut short by a crash ends the replay; with `truncate` (only
+        safe while holding the write lock) it is cut off the segment.
+        """
+        segment, offset = self.end()
+        while os.path.exists(self._segment_path(segment)):
+            path = self._segment_path(segment)
+            size = os.path.getsize(path)
+            while offset < size:
+                if offset + RECORD_HEADER.size > size:
+                    break
+                length = self._record_length(segment, offset)
+                if offset + RECORD_HEADER.size + length > size:
+                    break
+                block = self._read(segment, offset)
+                self.segments.append(segment)
+                self.offsets.append(offset)
+                yield block
+                offset += RECORD_HEADER.size + length
+            if offset < size:
+                if truncate:
+                    self._truncate(segment, offset)
+                return
+            if not os.path.exists(self._segment_path(segment + 1)):
+                return
+            segment, offset = segment + 1, 0
+
+    def _truncate(self, segment, offset):
+        with self._read_lock:
+            mapped = self._maps.pop(segment, None)
+            if mapped is not None:
+                mapped.close()
+        with open(self._segment_path(segment), 'r+b') as f:
+            f.truncate(offset)
+            os.fsync(f.fileno())
+        print(f"🔧 Truncated partial chain record in segment {segment} at byte {offset}")
+
+    @contextmanager
+    def locked(self):
+        """Exclusive write lock across processes"""
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield self
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def append(self, block):
+        """Durably appends a block; the caller must hold the write lock and have replayed the tail"""
+        payload = json.dumps(block, sort_keys=True).encode()
+        segment, offset = self.end()
+        if offset and offset + RECORD_HEADER.size + len(payload) > self.segment_bytes:
+            segment, offset = segment + 1, 0
+        with open(self._segment_path(segment), 'ab') as f:
+            f.write(RECORD_HEADER.pack(len(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.segments.append(segment)
+        self.offsets.append(offset)
+
+    def restore(self, segments, offsets):
+        """Adopts block locations saved in a checkpoint"""
+        self.segments = array('I', segments)
+        self.offsets = array('Q', offsets)
+        self._cache.clear()
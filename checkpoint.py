@@ -0,0 +1,159 @@
+import fcntl
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
+
+# first block, block count, index entry count, lengths of the block hash and index sections
+CHUNK_HEADER = struct.Struct('<QQQQQ')
+DIGEST_SIZE = 32
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def _next_chunk(data, position):
+    """Parses the chunk at `position`; returns None if it is torn or does not match its digest"""
+    body = position + CHUNK_HEADER.size
+    if body > len(data):
+        return None
+    start, count, entries, hashes_length, index_length = CHUNK_HEADER.unpack_from(data, position)
+    end = body + count * (4 + 8) + entries * (4 + 4) + hashes_length + index_length
+    if end + DIGEST_SIZE > len(data) or hashlib.sha256(data[position:end]).digest() != data[end:end + DIGEST_SIZE]:
+        return None
+    return start, count, entries, hashes_length, index_length, body, end + DIGEST_SIZE
+
+
+class IndexCheckpoint:
+    """Append-only binary checkpoint of the local chain's derived indexes.
+
+    Each chunk covers a contiguous run of blocks: their log locations, block
+    hashes and the grievance index entries they introduced, stored column by
+    column so loading is mostly bulk copies, followed by a SHA-256 of the chunk.
+    Saving only writes the blocks sealed since the previous chunk, and loading
+    stops at the first torn or edited chunk so the rest is replayed from the
+    log. The last verified block is kept in a small side file.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, 'index.checkpoint')
+        self.verified_path = os.path.join(directory, 'verified.json')
+        # blocks covered, and bytes of the file holding them, as far as this process has read
+        self.upto = 0
+        self._size = 0
+        self._file = open(self.path, 'a+b')
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _read_tail(self):
+        """Follows chunks appended since the last read; drops a torn chunk at the end"""
+        self._file.seek(self._size)
+        data = self._file.read()
+        position = 0
+        chunks = []
+        while (chunk := _next_chunk(data, position)) is not None and chunk[0] == self.upto:
+            chunks.append((chunk, position))
+            self.upto += chunk[1]
+            position = chunk[-1]
+        if position < len(data):
+            self._file.truncate(self._size + position)
+        self._size += position
+        return data, chunks
+
+    def load(self):
+        """Returns (segments, offsets, block_hashes, block_index) of every intact chunk"""
+        segments, offsets, block_hashes, block_index = array('I'), array('Q'), [], {}
+        with self._locked():
+            self.upto = self._size = 0
+            data, chunks = self._read_tail()
+        for (start, count, entries, hashes_length, index_length, body, _), _ in chunks:
+            sections = []
+            for length in (4 * count, 8 * count, 4 * entries, 4 * entries, hashes_length, index_length):
+                sections.append(data[body:body + length])
+                body += length
+            segments.extend(_from_little_endian('I', sections[0]))
+            offsets.extend(_from_little_endian('Q', sections[1]))
+            if count:
+                block_hashes.extend(sections[4].decode().split('\n'))
+            grievance_ids, audio_hashes = json.loads(sections[5])
+            positions = _from_little_endian('I', sections[2])
+            leaf_indexes = _from_little_endian('I', sections[3])
+            block_index.update(zip(grievance_ids, zip(positions, leaf_indexes, audio_hashes)))
+        return segments, offsets, block_hashes, block_index
+
+    def extend(self, end, collect):
+        """Appends one chunk for blocks [upto, end).
+
+        `collect(start, end)` returns their segments, offsets, block hashes and
+        the (grievance_id, position, leaf index, audio hash) entries first
+        indexed in them; blocks another process already checkpointed are skipped.
+        """
+        with self._locked():
+            self._read_tail()
+            start = self.upto
+            if end <= start:
+                return
+            segments, offsets, block_hashes, entries = collect(start, end)
+            hashes = '\n'.join(block_hashes).encode()
+            index = json.dumps([[entry[0] for entry in entries], [entry[3] for entry in entries]],
+                               separators=(',', ':')).encode()
+            chunk = b''.join([
+                CHUNK_HEADER.pack(start, end - start, len(entries), len(hashes), len(index)),
+                _little_endian(segments),
+                _little_endian(offsets),
+                _little_endian(array('I', [entry[1] for entry in entries])),
+                _little_endian(array('I', [entry[2] for entry in entries])),
+                hashes,
+                index
+            ])
+            chunk += hashlib.sha256(chunk).digest()
+            self._file.write(chunk)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._size += len(chunk)
+            self.upto = end
+
+    def reset(self):
+        """Discards every chunk, e.g. after the log was replaced"""
+        with self._locked():
+            self._file.truncate(0)
+            self.upto = self._size = 0
+
+    def save_verified(self, upto, block_hash):
+        tmp_path = f"{self.verified_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'verified_upto': upto, 'block_hash': block_hash}, f)
+        os.replace(tmp_path, self.verified_path)
+
+    def load_verified(self):
+        """Last verified block count and that block's hash, or (0, None)"""
+        try:
+            with open(self.verified_path) as f:
+                saved = json.load(f)
+            return int(saved['verified_upto']), saved['block_hash']
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0, None
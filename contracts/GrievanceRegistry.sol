@@ -9,9 +9,19 @@ contract GrievanceRegistry {
         address registeredBy;
     }
     
+    struct Batch {
+        uint256 size;
+        uint256 timestamp;
+        address anchoredBy;
+    }
+    
     mapping(string => Grievance) public grievances;
     string[] public grievanceIds;
     
+    // Merkle roots committing to batches of grievances
+    mapping(bytes32 => Batch) public batches;
+    uint256 public batchedGrievances;
+    
     // Event emitted when a new grievance is registered
     event GrievanceRegistered(
         string indexed grievanceId,
@@ -20,9 +30,17 @@ contract GrievanceRegistry {
         address indexed registeredBy
     );
     
+    // Event emitted when a batch Merkle root is anchored
+    event BatchAnchored(
+        bytes32 indexed root,
+        uint256 size,
+        uint256 timestamp,
+        address indexed anchoredBy
+    );
+    
     /**
      * @notice Register a new grievance on the blockchain
-     * @param _grievanceId The 6-digit ticket ID
+     * @param _grievanceId The numeric ticket ID (6 digits, wider once exhausted)
      * @param _audioHash The SHA-256 hash of the audio file (as bytes32)
      */
     function registerGrievance(
@@ -55,6 +73,73 @@ contract GrievanceRegistry {
         );
     }
     
+    /**
+     * @notice Anchor a batch of grievances with a single Merkle root
+     * @param _root Root over leaves sha256(0x00 ‖ grievanceId ‖ audioHash), inner nodes sha256(0x01 ‖ sorted pair)
+     * @param _size Number of grievances in the batch
+     */
+    function anchorBatch(bytes32 _root, uint256 _size) public {
+        require(_size > 0, "Empty batch");
+        require(batches[_root].timestamp == 0, "Batch already anchored");
+        
+        batches[_root] = Batch({
+            size: _size,
+            timestamp: block.timestamp,
+            anchoredBy: msg.sender
+        });
+        batchedGrievances += _size;
+        
+        emit BatchAnchored(_root, _size, block.timestamp, msg.sender);
+    }
+    
+    /**
+     * @notice Get an anchored batch by its Merkle root
+     * @param _root The batch root
+     * @return The batch struct
+     */
+    function getBatch(bytes32 _root) public view returns (Batch memory) {
+        require(batches[_root].timestamp > 0, "Batch not found");
+        return batches[_root];
+    }
+    
+    /**
+     * @notice Compute the Merkle leaf for a grievance
+     */
+    function leafHash(string memory _grievanceId, bytes32 _audioHash)
+        public
+        pure
+        returns (bytes32)
+    {
+        return sha256(abi.encodePacked(bytes1(0x00), _grievanceId, _audioHash));
+    }
+    
+    /**
+     * @notice Verify a grievance is included in an anchored batch
+     * @param _grievanceId The grievance ID
+     * @param _audioHash The SHA-256 hash of the audio file
+     * @param _proof Sibling hashes from the leaf up to the root
+     * @param _root The anchored batch root
+     * @return True if the proof is valid and the root is anchored
+     */
+    function verifyInclusion(
+        string memory _grievanceId,
+        bytes32 _audioHash,
+        bytes32[] memory _proof,
+        bytes32 _root
+    ) public view returns (bool) {
+        if (batches[_root].timestamp == 0) {
+            return false;
+        }
+        bytes32 computed = leafHash(_grievanceId, _audioHash);
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            computed = computed <= sibling
+                ? sha256(abi.encodePacked(bytes1(0x01), computed, sibling))
+                : sha256(abi.encodePacked(bytes1(0x01), sibling, computed));
+        }
+        return computed == _root;
+    }
+    
     /**
      * @notice Get grievance details by ID
      * @param _grievanceId The grievance ID to look up
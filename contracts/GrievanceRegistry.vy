@@ -0,0 +1,153 @@
+# pragma version 0.4.3
+# @license MIT
+"""
+@title GrievanceRegistry (Vyper build)
+@notice Same ABI, storage semantics, events and revert reasons as
+        GrievanceRegistry.sol. It builds with the pip-installable Vyper
+        compiler, so the benchmark's bytecode artifact can be rebuilt
+        without a solc binary:
+            vyper -f bytecode contracts/GrievanceRegistry.vy
+"""
+
+MAX_ID_LENGTH: constant(uint256) = 64
+MAX_PROOF_LENGTH: constant(uint256) = 64
+
+struct Grievance:
+    grievanceId: String[MAX_ID_LENGTH]
+    audioHash: bytes32
+    timestamp: uint256
+    registeredBy: address
+
+struct Batch:
+    size: uint256
+    timestamp: uint256
+    anchoredBy: address
+
+event GrievanceRegistered:
+    grievanceId: indexed(String[MAX_ID_LENGTH])
+    audioHash: bytes32
+    timestamp: uint256
+    registeredBy: indexed(address)
+
+event BatchAnchored:
+    root: indexed(bytes32)
+    size: uint256
+    timestamp: uint256
+    anchoredBy: indexed(address)
+
+records: HashMap[String[MAX_ID_LENGTH], Grievance]
+ids: HashMap[uint256, String[MAX_ID_LENGTH]]
+count: uint256
+
+anchored: HashMap[bytes32, Batch]
+batchedGrievances: public(uint256)
+
+
+@external
+def registerGrievance(_grievanceId: String[MAX_ID_LENGTH], _audioHash: bytes32):
+    assert len(self.records[_grievanceId].grievanceId) == 0, "Grievance ID already exists"
+    self.records[_grievanceId] = Grievance(
+        grievanceId=_grievanceId,
+        audioHash=_audioHash,
+        timestamp=block.timestamp,
+        registeredBy=msg.sender
+    )
+    self.ids[self.count] = _grievanceId
+    self.count += 1
+    log GrievanceRegistered(
+        grievanceId=_grievanceId, audioHash=_audioHash, timestamp=block.timestamp, registeredBy=msg.sender
+    )
+
+
+@external
+def anchorBatch(_root: bytes32, _size: uint256):
+    assert _size > 0, "Empty batch"
+    assert self.anchored[_root].timestamp == 0, "Batch already anchored"
+    self.anchored[_root] = Batch(size=_size, timestamp=block.timestamp, anchoredBy=msg.sender)
+    self.batchedGrievances += _size
+    log BatchAnchored(root=_root, size=_size, timestamp=block.timestamp, anchoredBy=msg.sender)
+
+
+@external
+@view
+def batches(_root: bytes32) -> (uint256, uint256, address):
+    batch: Batch = self.anchored[_root]
+    return batch.size, batch.timestamp, batch.anchoredBy
+
+
+@external
+@view
+def getBatch(_root: bytes32) -> Batch:
+    assert self.anchored[_root].timestamp > 0, "Batch not found"
+    return self.anchored[_root]
+
+
+@internal
+@pure
+def _leaf_hash(_grievanceId: String[MAX_ID_LENGTH], _audioHash: bytes32) -> bytes32:
+    return sha256(concat(b"\x00", convert(_grievanceId, Bytes[MAX_ID_LENGTH]), _audioHash))
+
+
+@external
+@pure
+def leafHash(_grievanceId: String[MAX_ID_LENGTH], _audioHash: bytes32) -> bytes32:
+    return self._leaf_hash(_grievanceId, _audioHash)
+
+
+@external
+@view
+def verifyInclusion(
+    _grievanceId: String[MAX_ID_LENGTH],
+    _audioHash: bytes32,
+    _proof: DynArray[bytes32, MAX_PROOF_LENGTH],
+    _root: bytes32
+) -> bool:
+    if self.anchored[_root].timestamp == 0:
+        return False
+    computed: bytes32 = self._leaf_hash(_grievanceId, _audioHash)
+    for sibling: bytes32 in _proof:
+        if convert(computed, uint256) <= convert(sibling, uint256):
+            computed = sha256(concat(b"\x01", computed, sibling))
+        else:
+            computed = sha256(concat(b"\x01", sibling, computed))
+    return computed == _root
+
+
+@external
+@view
+def grievances(_grievanceId: String[MAX_ID_LENGTH]) -> (String[MAX_ID_LENGTH], bytes32, uint256, address):
+    record: Grievance = self.records[_grievanceId]
+    return record.grievanceId, record.audioHash, record.timestamp, record.registeredBy
+
+
+@external
+@view
+def grievanceIds(_index: uint256) -> String[MAX_ID_LENGTH]:
+    assert _index < self.count
+    return self.ids[_index]
+
+
+@external
+@view
+def getGrievance(_grievanceId: String[MAX_ID_LENGTH]) -> Grievance:
+    assert len(self.records[_grievanceId].grievanceId) > 0, "Grievance not found"
+    return self.records[_grievanceId]
+
+
+@external
+@view
+def grievanceExists(_grievanceId: String[MAX_ID_LENGTH]) -> bool:
+    return len(self.records[_grievanceId].grievanceId) > 0
+
+
+@external
+@view
+def getTotalGrievances() -> uint256:
+    return self.count
+
+
+@external
+@view
+def verifyHash(_grievanceId: String[MAX_ID_LENGTH], _audioHash: bytes32) -> bool:
+    assert len(self.records[_grievanceId].grievanceId) > 0, "Grievance not found"
+    return self.records[_grievanceId].audioHash == _audioHash
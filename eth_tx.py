@@ -0,0 +1,366 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from metrics import timed
+from storage import SQLiteConnections
+
+NONCE_ERRORS = ('nonce too low', 'already known', 'replacement transaction underpriced', 'nonce too high')
+
+
+class TransactionPipeline(SQLiteConnections):
+    """Asynchronous Ethereum transaction submission for a single wallet.
+
+    Nonces are allocated from a SQLite row so every worker process sharing the
+    wallet gets a distinct one without asking the node. Gas price and balance
+    are cached and refreshed in the background. A poller follows receipts,
+    reports confirmation state through `on_update(meta, info)` and replaces
+    transactions that stay unmined for too long with a higher gas price.
+
+    Sent transactions are recorded in SQLite under a lease renewed by the
+    poller, so receipts are still followed after a restart: any process
+    sharing the wallet adopts records whose lease has lapsed. `meta` must be
+    JSON-serialisable. A submission with a `key` is sent at most once while
+    it is queued or unconfirmed; submitting the same key again returns the
+    existing transaction.
+
+    The poller also watches for a nonce that was allocated but never
+    broadcast (a crash, or a send that failed after allocation). Such a gap
+    blocks every later transaction, so once it has persisted for `gap_after`
+    seconds it is closed: the counter is reset when nothing above the gap
+    was sent, otherwise the hole is filled with an empty self-transfer.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS eth_nonces (
+            address TEXT PRIMARY KEY,
+            next_nonce INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS eth_transactions (
+            address TEXT NOT NULL,
+            nonce INTEGER NOT NULL,
+            tx TEXT NOT NULL,
+            meta TEXT NOT NULL,
+            hashes TEXT NOT NULL,
+            gas_price INTEGER NOT NULL,
+            sent_at REAL NOT NULL,
+            owner TEXT,
+            lease_until REAL,
+            key TEXT,
+            PRIMARY KEY (address, nonce)
+        );
+    """
+
+    def __init__(self, w3, account, private_key, db_path, on_update=None, refresh_interval=30.0,
+                 poll_interval=5.0, confirmations=2, stuck_after=180.0, gas_bump=1.125, max_resyncs=3,
+                 gap_after=30.0):
+        self.w3 = w3
+        self.account = account
+        self.private_key = private_key
+        self.path = db_path
+        self.on_update = on_update
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.stuck_after = stuck_after
+        self.gas_bump = gas_bump
+        self.max_resyncs = max_resyncs
+        self.gap_after = gap_after
+        # a record not renewed for this long belongs to a process that is gone
+        self.lease_seconds = max(60.0, poll_interval * 6)
+        self.owner = uuid.uuid4().hex
+
+        self.gas_price = None
+        self.balance = None
+        self._queue = queue.Queue()
+        self._pending = {}  # key -> Future of a queued, not yet sent submission
+        self._lock = threading.Lock()
+        self._gap = None  # (nonce, first seen) of a suspected nonce gap
+        self._stopping = threading.Event()
+        self._threads = []
+        self.stats = {'submitted': 0, 'confirmed': 0, 'reverted': 0, 'failed': 0, 'replaced': 0, 'gaps': 0}
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(eth_transactions)')}
+        if 'key' not in columns:
+            conn.execute('ALTER TABLE eth_transactions ADD COLUMN key TEXT')
+
+    def start(self):
+        if self._threads:
+            return
+        self._refresh()
+        self._resync_nonce(keep_higher=True)
+        for target, name in ((self._send_loop, 'tx-sender'), (self._poll_loop, 'tx-receipts'),
+                             (self._refresh_loop, 'tx-gas-refresh')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join(5)
+
+    def submit(self, build, meta=None, key=None):
+        """Queues a transaction; `build(params)` returns the unsigned tx for the given
+        from/nonce/gasPrice. The returned Future resolves to the tx hash once sent.
+        With a `key`, a submission already queued or awaiting confirmation is reused."""
+        with self._lock:
+            if key is not None:
+                future = self._pending.get(key)
+                if future is not None:
+                    return future
+                row = self._conn().execute('SELECT hashes FROM eth_transactions WHERE address = ? AND key = ?',
+                                           (self.account.address, key)).fetchone()
+                if row is not None:
+                    future = Future()
+                    future.set_result(json.loads(row['hashes'])[-1])
+                    return future
+            future = Future()
+            if key is not None:
+                self._pending[key] = future
+        self._queue.put((build, meta or {}, key, future))
+        return future
+
+    def _notify(self, meta, **info):
+        if self.on_update:
+            try:
+                self.on_update(meta, info)
+            except Exception as e:
+                print(f"⚠️ Transaction update handler failed: {e}")
+
+    def _refresh(self):
+        try:
+            self.gas_price = self.w3.eth.gas_price
+            self.balance = self.w3.eth.get_balance(self.account.address)
+        except Exception as e:
+            print(f"⚠️ Gas/balance refresh failed: {e}")
+
+    def _refresh_loop(self):
+        while not self._stopping.wait(self.refresh_interval):
+            self._refresh()
+
+    def _resync_nonce(self, keep_higher=False):
+        """Realigns the shared nonce counter with the node's pending transaction count"""
+        chain_nonce = self.w3.eth.get_transaction_count(self.account.address, 'pending')
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT next_nonce FROM eth_nonces WHERE address = ?',
+                               (self.account.address,)).fetchone()
+            next_nonce = max(chain_nonce, row[0]) if (row and keep_higher) else chain_nonce
+            conn.execute(
+                'INSERT INTO eth_nonces (address, next_nonce) VALUES (?, ?) '
+                'ON CONFLICT(address) DO UPDATE SET next_nonce = excluded.next_nonce',
+                (self.account.address, next_nonce)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _release_nonce(self, nonce):
+        """Hands back a nonce that was never broadcast, unless a later one was allocated since"""
+        self._conn().execute('UPDATE eth_nonces SET next_nonce = ? WHERE address = ? AND next_nonce = ?',
+                             (nonce, self.account.address, nonce + 1))
+
+    def _allocate_nonce(self):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            nonce = conn.execute('SELECT next_nonce FROM eth_nonces WHERE address = ?',
+                                 (self.account.address,)).fetchone()[0]
+            conn.execute('UPDATE eth_nonces SET next_nonce = ? WHERE address = ?',
+                         (nonce + 1, self.account.address))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return nonce
+
+    def _sign_and_send(self, tx):
+        signed_tx = self.w3.eth.account.sign_transaction(tx, self.private_key)
+        return self.w3.to_hex(self.w3.eth.send_raw_transaction(signed_tx.raw_transaction))
+
+    def _send_loop(self):
+        while not self._stopping.is_set():
+            item = self._queue.get()
+            if item is None:
+                return
+            build, meta, key, future = item
+            try:
+                tx_hash = self._send(build, meta, key)
+                future.set_result(tx_hash)
+            except Exception as e:
+                self.stats['failed'] += 1
+                print(f"❌ Blockchain Write Error: {e}")
+                self._notify(meta, state='failed', error=str(e))
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+    def _send(self, build, meta, key=None):
+        if self.balance == 0:
+            raise RuntimeError("Wallet has 0 ETH")
+        resyncs = 0
+        while True:
+            nonce = self._allocate_nonce()
+            gas_price = self.gas_price or self.w3.eth.gas_price
+            try:
+                tx = build({'from': self.account.address, 'nonce': nonce, 'gasPrice': gas_price})
+                with timed('eth_submit'):
+                    tx_hash = self._sign_and_send(tx)
+                break
+            except Exception as e:
+                if not any(err in str(e).lower() for err in NONCE_ERRORS):
+                    # nothing was broadcast; avoid leaving a gap in the nonce sequence
+                    self._release_nonce(nonce)
+                    raise
+                # the counter fell behind the node; never move it below what other processes allocated
+                self._resync_nonce(keep_higher=True)
+                if resyncs >= self.max_resyncs:
+                    raise
+                resyncs += 1
+
+        self._record_sent(nonce, tx, meta, tx_hash, gas_price, key)
+        self.stats['submitted'] += 1
+        self._notify(meta, state='submitted', tx_hash=tx_hash)
+        return tx_hash
+
+    def _record_sent(self, nonce, tx, meta, tx_hash, gas_price, key=None):
+        now = time.time()
+        self._conn().execute(
+            'INSERT OR REPLACE INTO eth_transactions '
+            '(address, nonce, tx, meta, hashes, gas_price, sent_at, owner, lease_until, key) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.account.address, nonce, json.dumps(tx), json.dumps(meta), json.dumps([tx_hash]),
+             gas_price, now, self.owner, now + self.lease_seconds, key)
+        )
+
+    def _poll_loop(self):
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"⚠️ Receipt polling failed: {e}")
+            try:
+                self._close_nonce_gap()
+            except Exception as e:
+                print(f"⚠️ Nonce gap check failed: {e}")
+
+    def _close_nonce_gap(self):
+        """Finds a nonce below the shared counter that the node never received and closes it"""
+        chain_nonce = self.w3.eth.get_transaction_count(self.account.address, 'pending')
+        conn = self._conn()
+        next_nonce = conn.execute('SELECT next_nonce FROM eth_nonces WHERE address = ?',
+                                  (self.account.address,)).fetchone()[0]
+        sent = {row[0] for row in conn.execute('SELECT nonce FROM eth_transactions WHERE address = ? AND nonce >= ?',
+                                               (self.account.address, chain_nonce))}
+        if next_nonce <= chain_nonce or chain_nonce in sent:
+            self._gap = None
+            return
+        # the nonce may belong to a send still in progress; act only once the gap has persisted
+        if self._gap is None or self._gap[0] != chain_nonce:
+            self._gap = (chain_nonce, time.time())
+            return
+        if time.time() - self._gap[1] < self.gap_after:
+            return
+        self._gap = None
+        self.stats['gaps'] += 1
+        if not sent:
+            conn.execute('UPDATE eth_nonces SET next_nonce = ? WHERE address = ? AND next_nonce = ?',
+                         (chain_nonce, self.account.address, next_nonce))
+            print(f"🔁 Nonce counter reset from {next_nonce} to {chain_nonce} (allocated nonces were never sent)")
+            return
+        gas_price = self.gas_price or self.w3.eth.gas_price
+        tx = {'from': self.account.address, 'to': self.account.address, 'value': 0, 'gas': 21000,
+              'gasPrice': gas_price, 'nonce': chain_nonce, 'chainId': self.w3.eth.chain_id}
+        tx_hash = self._sign_and_send(tx)
+        self._record_sent(chain_nonce, tx, {}, tx_hash, gas_price)
+        print(f"🔁 Filled nonce gap {chain_nonce} with {tx_hash}")
+
+    def _claim_records(self):
+        """Renews this process's transaction leases, adopts lapsed ones and returns them by nonce"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE eth_transactions SET owner = ?, lease_until = ? '
+                'WHERE address = ? AND (owner = ? OR lease_until IS NULL OR lease_until < ?)',
+                (self.owner, now + self.lease_seconds, self.account.address, self.owner, now)
+            )
+            rows = conn.execute('SELECT * FROM eth_transactions WHERE address = ? AND owner = ? ORDER BY nonce',
+                                (self.account.address, self.owner)).fetchall()
+        return {row['nonce']: {'tx': json.loads(row['tx']), 'meta': json.loads(row['meta']),
+                               'hashes': json.loads(row['hashes']), 'gas_price': row['gas_price'],
+                               'sent_at': row['sent_at']}
+                for row in rows}
+
+    def _save_record(self, nonce, record):
+        self._conn().execute(
+            'UPDATE eth_transactions SET tx = ?, hashes = ?, gas_price = ?, sent_at = ? '
+            'WHERE address = ? AND nonce = ? AND owner = ?',
+            (json.dumps(record['tx']), json.dumps(record['hashes']), record['gas_price'], record['sent_at'],
+             self.account.address, nonce, self.owner)
+        )
+
+    def _poll(self):
+        pending = self._claim_records()
+        if not pending:
+            return
+        head = self.w3.eth.block_number
+        for nonce, record in pending.items():
+            receipt = None
+            for tx_hash in reversed(record['hashes']):
+                try:
+                    receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+                except Exception:
+                    receipt = None
+                if receipt:
+                    break
+            if receipt:
+                depth = head - receipt['blockNumber'] + 1
+                if depth >= self.confirmations:
+                    state = 'confirmed' if receipt['status'] == 1 else 'reverted'
+                    self.stats[state] += 1
+                    self._conn().execute('DELETE FROM eth_transactions WHERE address = ? AND nonce = ?',
+                                         (self.account.address, nonce))
+                    self._notify(record['meta'], state=state, tx_hash=self.w3.to_hex(receipt['transactionHash']),
+                                 block_number=receipt['blockNumber'])
+            elif time.time() - record['sent_at'] > self.stuck_after:
+                self._replace(nonce, record)
+
+    def _replace(self, nonce, record):
+        """Re-sends a stuck transaction with the same nonce and a bumped gas price"""
+        gas_price = max(int(record['gas_price'] * self.gas_bump) + 1, self.gas_price or 0)
+        tx = dict(record['tx'], gasPrice=gas_price)
+        try:
+            tx_hash = self._sign_and_send(tx)
+        except Exception as e:
+            if 'nonce too low' in str(e).lower():
+                # an earlier hash for this nonce was mined; the next poll picks up its receipt
+                record['sent_at'] = time.time()
+                self._save_record(nonce, record)
+                return
+            print(f"⚠️ Replacing stuck transaction (nonce {nonce}) failed: {e}")
+            return
+        record.update(tx=tx, gas_price=gas_price, sent_at=time.time())
+        record['hashes'].append(tx_hash)
+        self._save_record(nonce, record)
+        self.stats['replaced'] += 1
+        print(f"🔁 Replaced stuck transaction (nonce {nonce}): {tx_hash}")
+        self._notify(record['meta'], state='submitted', tx_hash=tx_hash)
+
+    def metrics(self):
+        in_flight = self._conn().execute('SELECT COUNT(*) FROM eth_transactions WHERE address = ?',
+                                         (self.account.address,)).fetchone()[0]
+        return {
+            'queued': self._queue.qsize(),
+            'in_flight': in_flight,
+            'gas_price': self.gas_price,
+            'balance': self.balance,
+            **self.stats
+        }
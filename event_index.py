@@ -0,0 +1,162 @@
+import threading
+from web3 import Web3
+from storage import SQLiteConnections
+
+GRIEVANCE_REGISTERED = Web3.keccak(text='GrievanceRegistered(string,bytes32,uint256,address)')
+
+
+def grievance_topic(grievance_id):
+    """The indexed topic of a grievance id: logs only carry keccak(grievanceId)"""
+    return bytes(Web3.keccak(text=str(grievance_id)))
+
+
+class EventIndexer(SQLiteConnections):
+    """Follows GrievanceRegistered logs into a local table keyed by grievance topic.
+
+    Logs are fetched in bounded block ranges from a persisted checkpoint. The
+    hash of the checkpoint block is stored with it; when the node no longer
+    agrees on that hash the indexer rewinds `reorg_depth` blocks and re-reads
+    them, dropping any logs from the abandoned fork.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chain_events (
+            topic BLOB PRIMARY KEY,
+            tx_hash TEXT NOT NULL,
+            block_number INTEGER NOT NULL,
+            block_hash TEXT NOT NULL,
+            audio_hash TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            registered_by TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_chain_events_block ON chain_events(block_number);
+
+        CREATE TABLE IF NOT EXISTS index_checkpoints (
+            name TEXT PRIMARY KEY,
+            block_number INTEGER NOT NULL,
+            block_hash TEXT
+        );
+    """
+
+    def __init__(self, w3, contract_address, path, start_block=0, chunk_size=2000,
+                 reorg_depth=12, interval=15.0):
+        self.w3 = w3
+        self.address = contract_address
+        self.path = path
+        self.name = f'events:{contract_address.lower()}'
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.max_chunk_size = chunk_size
+        self.reorg_depth = reorg_depth
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+        self._conn().executescript(self.SCHEMA)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='event-indexer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                caught_up = self.sync_once()
+            except Exception as e:
+                print(f"⚠️ Event indexing failed: {e}")
+                caught_up = True
+            if caught_up:
+                self._stopping.wait(self.interval)
+
+    def checkpoint(self):
+        row = self._conn().execute(
+            'SELECT block_number, block_hash FROM index_checkpoints WHERE name = ?', (self.name,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (self.start_block - 1, None)
+
+    def _block_hash(self, number):
+        return Web3.to_hex(self.w3.eth.get_block(number)['hash'])
+
+    def _rewind(self, checkpoint):
+        target = max(self.start_block - 1, checkpoint - self.reorg_depth)
+        target_hash = self._block_hash(target) if target >= 0 else None
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM chain_events WHERE block_number > ?', (target,))
+            conn.execute('UPDATE index_checkpoints SET block_number = ?, block_hash = ? WHERE name = ?',
+                         (target, target_hash, self.name))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        print(f"🔁 Chain reorg detected at block {checkpoint}; re-indexing from {target + 1}")
+
+    def sync_once(self):
+        """Indexes the next block range; returns True once the head is reached"""
+        checkpoint, checkpoint_hash = self.checkpoint()
+        if checkpoint_hash and self._block_hash(checkpoint) != checkpoint_hash:
+            self._rewind(checkpoint)
+            return False
+
+        head = self.w3.eth.block_number
+        if checkpoint >= head:
+            return True
+        from_block = checkpoint + 1
+        to_block = min(head, from_block + self.chunk_size - 1)
+        try:
+            logs = self.w3.eth.get_logs({
+                'address': self.address,
+                'topics': [GRIEVANCE_REGISTERED],
+                'fromBlock': from_block,
+                'toBlock': to_block
+            })
+        except Exception:
+            # providers cap the range or result count of a single query
+            if self.chunk_size == 1:
+                raise
+            self.chunk_size = max(1, self.chunk_size // 2)
+            return False
+
+        self._store(logs, to_block, self._block_hash(to_block))
+        self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+        return to_block >= head
+
+    def _store(self, logs, to_block, to_block_hash):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for log in logs:
+                data = bytes(log['data'])
+                conn.execute(
+                    'INSERT OR REPLACE INTO chain_events '
+                    '(topic, tx_hash, block_number, block_hash, audio_hash, timestamp, registered_by) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (bytes(log['topics'][1]), Web3.to_hex(log['transactionHash']), log['blockNumber'],
+                     Web3.to_hex(log['blockHash']), data[:32].hex(), int.from_bytes(data[32:64], 'big'),
+                     Web3.to_checksum_address(bytes(log['topics'][2])[-20:]))
+                )
+            conn.execute(
+                'INSERT INTO index_checkpoints (name, block_number, block_hash) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET block_number = excluded.block_number, '
+                'block_hash = excluded.block_hash',
+                (self.name, to_block, to_block_hash)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def lookup(self, grievance_id):
+        """The indexed registration of a grievance, or None if not (yet) seen"""
+        row = self._conn().execute(
+            'SELECT tx_hash, block_number, block_hash, audio_hash, timestamp, registered_by '
+            'FROM chain_events WHERE topic = ?',
+            (grievance_topic(grievance_id),)
+        ).fetchone()
+        return dict(row) if row else None
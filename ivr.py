@@ -0,0 +1,157 @@
+import threading
+import time
+from flask import request, redirect
+from twilio.twiml.voice_response import VoiceResponse, Gather
+
+VOICE = {'voice': 'Polly.Aditi', 'language': 'en-IN'}
+NO_ANSWER = "Koi jawab nahi mila. Dobara try karein."
+
+MENU_PROMPT = "Apni shikayat register karne ke liye 1 dabayein. Status check karne ke liye 2 dabayein."
+INVALID_OPTION = "Galat option. Dobara try karein."
+STATUS_PROMPT = "Apna tracking number enter karein, aur uske baad hash dabayein."
+RECORD_PROMPT = "Dhanyavaad. Ab beep ke baad apni shikayat clearly bolein."
+
+# questions asked before recording: (session field, prompt on /ask_<field>,
+# prompt when it follows the previous answer)
+SPEECH_STEPS = (
+    ('state', "Pehle batayein, aap kis state se bol rahe hain?", None),
+    ('city', "Aapka shehar ya Jilla kya hai?", "Theek hai. Ab batayein aapka shehar ya Jilla kya hai?"),
+    ('location', "Aapka area ya mohalla kya hai?", "Aur aapka area ya mohalla kya hai?"),
+)
+
+
+def speech_question(field, prompt):
+    """A speech gather for one field, re-asked via /ask_<field> on silence"""
+    resp = VoiceResponse()
+    gather = Gather(input='speech', timeout=5, action=f'/save_{field}', method='POST',
+                    language='en-IN', speechTimeout='auto')
+    gather.say(prompt, **VOICE)
+    resp.append(gather)
+    resp.say(NO_ANSWER, **VOICE)
+    resp.redirect(f'/ask_{field}')
+    return str(resp)
+
+
+def redirect_twiml(url):
+    resp = VoiceResponse()
+    resp.redirect(url)
+    return str(resp)
+
+
+class IVRFlow:
+    """The call flow as data, with every TwiML document rendered once up front.
+
+    Webhooks only pick a precompiled document (the main menu has one per
+    greeting variant) and store speech answers through `on_answer(call_sid,
+    field, value)`. Each route's latency is recorded for `timings()`.
+    """
+
+    def __init__(self, greetings, on_answer, greeting=None, steps=SPEECH_STEPS,
+                 record_action='/handle_recording', status_action='/status_result'):
+        self.greeting = greeting
+        self.on_answer = on_answer
+        self.steps = steps
+        self.record_action = record_action
+        self.status_action = status_action
+        self._timings = {}
+        self._lock = threading.Lock()
+
+        self.menus = {text: self._menu(text) for text in greetings}
+        self.documents = {
+            'start': redirect_twiml(f'/ask_{steps[0][0]}'),
+            'status': self._status(),
+            'invalid': self._invalid(),
+            'record': self._record(),
+        }
+        for field, prompt, follow_up in steps:
+            self.documents[f'ask_{field}'] = speech_question(field, prompt)
+            if follow_up:
+                self.documents[f'next_{field}'] = speech_question(field, follow_up)
+
+    def _menu(self, greeting):
+        resp = VoiceResponse()
+        gather = Gather(num_digits=1, action='/gather', method='POST')
+        gather.say(f"{greeting} {MENU_PROMPT}", **VOICE)
+        resp.append(gather)
+        resp.redirect('/voice')
+        return str(resp)
+
+    def _status(self):
+        # ticket ids can be wider than six digits, so the caller ends the number with '#'
+        resp = VoiceResponse()
+        gather = Gather(finish_on_key='#', timeout=10, action=self.status_action, method='POST')
+        gather.say(STATUS_PROMPT, **VOICE)
+        resp.append(gather)
+        return str(resp)
+
+    def _invalid(self):
+        resp = VoiceResponse()
+        resp.say(INVALID_OPTION, **VOICE)
+        resp.redirect('/voice')
+        return str(resp)
+
+    def _record(self):
+        resp = VoiceResponse()
+        resp.say(RECORD_PROMPT, **VOICE)
+        resp.record(maxLength=60, finishOnKey='#', playBeep=True, action=self.record_action)
+        return str(resp)
+
+    def voice(self):
+        greeting = self.greeting() if self.greeting else ''
+        document = self.menus.get(greeting)
+        if document is None:
+            document = self.menus[greeting] = self._menu(greeting)
+        return document
+
+    def gather(self):
+        digit = request.values.get('Digits', None)
+        if digit == '1':
+            return self.documents['start']
+        if digit == '2':
+            return self.documents['status']
+        return self.documents['invalid']
+
+    def ask(self, field):
+        return self.documents[f'ask_{field}']
+
+    def save(self, field, next_field):
+        value = request.values.get('SpeechResult', None)
+        if not value:
+            return redirect(f'/ask_{field}')
+        self.on_answer(request.values.get('CallSid'), field, value)
+        if next_field is None:
+            return self.documents['record']
+        return self.documents[f'next_{next_field}']
+
+    def _timed(self, route, handler):
+        def view(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000
+                with self._lock:
+                    timing = self._timings.setdefault(route, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+                    timing['count'] += 1
+                    timing['total_ms'] += elapsed
+                    timing['max_ms'] = max(timing['max_ms'], elapsed)
+        return view
+
+    def register(self, app):
+        """Adds the flow's webhook routes to the Flask app"""
+        routes = [('/voice', self.voice), ('/gather', self.gather)]
+        for index, (field, _, _) in enumerate(self.steps):
+            next_field = self.steps[index + 1][0] if index + 1 < len(self.steps) else None
+            routes.append((f'/ask_{field}', lambda field=field: self.ask(field)))
+            routes.append((f'/save_{field}', lambda field=field, next_field=next_field: self.save(field, next_field)))
+        for rule, handler in routes:
+            endpoint = rule.strip('/')
+            app.add_url_rule(rule, endpoint, self._timed(endpoint, handler), methods=['GET', 'POST'])
+
+    def timings(self):
+        with self._lock:
+            return {
+                route: {'count': t['count'], 'avg_ms': round(t['total_ms'] / t['count'], 3),
+                        'max_ms': round(t['max_ms'], 3)}
+                for route, t in self._timings.items()
+            }
@@ -0,0 +1,326 @@
+import json
+import os
+import random
+import socket
+import threading
+import uuid
+import time
+import traceback
+from metrics import JOB_LATENCY, JOB_STAGE_LATENCY
+from storage import SQLiteConnections
+
+# lease owners of the queues created by this process
+_LIVE_OWNERS = set()
+
+
+class Stage:
+    """One retryable step of a job pipeline"""
+
+    def __init__(self, name, run, max_attempts=5, on_exhausted=None):
+        self.name = name
+        self.run = run
+        self.max_attempts = max_attempts
+        # when set, a stage that runs out of attempts records the error and lets the job continue
+        self.on_exhausted = on_exhausted
+
+
+class JobQueue(SQLiteConnections):
+    """Persistent SQLite-backed job queue drained by a fixed-size worker pool.
+
+    Each job walks through the queue's stages in order and checkpoints its context
+    after every stage, so a job interrupted by a restart resumes where it stopped.
+    Running jobs hold a lease tagged with the owning process, renewed by a
+    heartbeat while the stage runs. Jobs whose lease expired (hung or crashed
+    worker) are picked up again by any process sharing the database, and a
+    restarted process reclaims the leases its dead predecessor left behind on
+    this host right away.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            queue TEXT NOT NULL,
+            dedup_key TEXT,
+            state TEXT NOT NULL DEFAULT 'queued',
+            stage INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            context TEXT NOT NULL,
+            last_error TEXT,
+            next_run_at REAL NOT NULL,
+            lease_until REAL,
+            lease_owner TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            UNIQUE (queue, dedup_key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(queue, state, next_run_at);
+    """
+
+    def __init__(self, path, name, stages, on_failure=None, workers=4,
+                 backoff_base=2.0, backoff_max=300.0, lease_seconds=600.0, poll_interval=1.0):
+        self.path = path
+        self.name = name
+        self.stages = stages
+        self.on_failure = on_failure
+        self.workers = workers
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = set()  # ids of the jobs this queue's workers are executing
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'retried': 0, 'duplicates': 0}
+        # host:pid:token, unique per queue instance even when a restarted container reuses the pid
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        _LIVE_OWNERS.add(self.owner)
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+        if 'lease_owner' not in columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN lease_owner TEXT')
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def submit(self, context, dedup_key=None):
+        """Persists a new job; returns False if a job with the same dedup_key already exists"""
+        now = time.time()
+        cursor = self._conn().execute(
+            'INSERT OR IGNORE INTO jobs (queue, dedup_key, context, next_run_at, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (self.name, dedup_key, json.dumps(context), now, now, now)
+        )
+        if cursor.rowcount == 0:
+            self._count('duplicates')
+            return False
+        self._count('submitted')
+        self._wakeup.set()
+        return True
+
+    @staticmethod
+    def _owner_alive(owner):
+        """False when the lease owner was a process on this host that no longer runs"""
+        host, pid, _ = (owner or '::').split(':', 2)
+        if owner in _LIVE_OWNERS or host != socket.gethostname() or not pid.isdigit():
+            return True
+        if int(pid) == os.getpid():
+            # same pid but an unknown token: an earlier run of a restarted container
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _reclaim(self):
+        """Requeues running jobs whose lease expired or whose owner process is gone"""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, lease_until, lease_owner FROM jobs WHERE queue = ? AND state = 'running'",
+                (self.name,)
+            ).fetchall()
+            now = time.time()
+            stale = [row['id'] for row in rows
+                     if row['lease_owner'] != self.owner
+                     and ((row['lease_until'] or 0) < now or not self._owner_alive(row['lease_owner']))]
+            conn.executemany(
+                "UPDATE jobs SET state = 'queued', lease_until = NULL, lease_owner = NULL WHERE id = ?",
+                [(job_id,) for job_id in stale]
+            )
+        return len(stale)
+
+    def start(self):
+        """Requeues jobs orphaned by a previous run and starts the worker pool"""
+        if self._threads:
+            return
+        reclaimed = self._reclaim()
+        if reclaimed:
+            print(f"🔁 Replaying {reclaimed} interrupted '{self.name}' job(s)")
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name=f"{self.name}-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _heartbeat(self):
+        """Renews the leases of the jobs the workers are executing, so long stages are never claimed twice"""
+        while not self._stopping.wait(self.lease_seconds / 3):
+            with self._lock:
+                running = list(self._running)
+            try:
+                self._conn().executemany(
+                    "UPDATE jobs SET lease_until = ? WHERE id = ? AND lease_owner = ? AND state = 'running'",
+                    [(time.time() + self.lease_seconds, job_id, self.owner) for job_id in running]
+                )
+            except Exception as e:
+                print(f"⚠️ Job queue '{self.name}' lease renewal failed: {e}")
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _claim(self):
+        """Atomically leases the next runnable job, or returns None"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE queue = ? AND ("
+                "(state = 'queued' AND next_run_at <= ?) OR (state = 'running' AND lease_until < ?)"
+                ") ORDER BY next_run_at, id LIMIT 1",
+                (self.name, now, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET state = 'running', lease_until = ?, lease_owner = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (now + self.lease_seconds, self.owner, now, row['id'])
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def _checkpoint(self, job_id, **fields):
+        """Saves job progress; a no-op if the lease has passed to another owner"""
+        fields['updated_at'] = time.time()
+        if fields.get('state') in ('queued', 'failed', 'done'):
+            fields['lease_owner'] = None
+        assignments = ', '.join(f'{col} = ?' for col in fields)
+        self._conn().execute(f'UPDATE jobs SET {assignments} WHERE id = ? AND lease_owner = ?',
+                             list(fields.values()) + [job_id, self.owner])
+
+    def _backoff(self, attempts):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                row = self._claim()
+            except Exception as e:
+                print(f"❌ Job queue '{self.name}' claim error: {e}")
+                row = None
+            if row is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            with self._lock:
+                self._in_flight += 1
+                self._running.add(row['id'])
+            try:
+                self._run(row)
+            except Exception as e:
+                # a failing handler or checkpoint must not kill the worker or strand the job as running
+                traceback.print_exc()
+                self._abandon(row, e)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._running.discard(row['id'])
+
+    def _abandon(self, row, error):
+        """Requeues (or fails, once its stage is out of attempts) a job whose run raised unexpectedly"""
+        attempts = row['attempts'] + 1
+        stage = self.stages[min(row['stage'], len(self.stages) - 1)]
+        try:
+            if attempts < stage.max_attempts:
+                self._count('retried')
+                self._checkpoint(row['id'], state='queued', attempts=attempts, lease_until=None,
+                                 last_error=f"{stage.name}: {error}",
+                                 next_run_at=time.time() + self._backoff(attempts))
+            else:
+                self._count('failed')
+                self._checkpoint(row['id'], state='failed', attempts=attempts, lease_until=None,
+                                 last_error=f"{stage.name}: {error}")
+                if self.on_failure:
+                    self.on_failure(json.loads(row['context']), error)
+        except Exception as e:
+            # the lease is no longer renewed, so another claim picks the job up once it expires
+            print(f"❌ Job queue '{self.name}' could not release job {row['id']}: {e}")
+
+    def _run(self, row):
+        """Runs the job from its checkpointed stage until it completes, fails or must wait"""
+        job_id = row['id']
+        context = json.loads(row['context'])
+        stage_index = row['stage']
+        attempts = row['attempts']
+
+        while stage_index < len(self.stages):
+            stage = self.stages[stage_index]
+            try:
+                with JOB_STAGE_LATENCY.time(queue=self.name, stage=stage.name):
+                    context.update(stage.run(context) or {})
+            except Exception as e:
+                attempts += 1
+                error = f"{stage.name}: {e}"
+                if attempts < stage.max_attempts:
+                    self._count('retried')
+                    self._checkpoint(job_id, state='queued', attempts=attempts, last_error=error,
+                                     context=json.dumps(context), lease_until=None,
+                                     next_run_at=time.time() + self._backoff(attempts))
+                    print(f"⚠️ {self.name} job {job_id} stage '{stage.name}' failed "
+                          f"(attempt {attempts}/{stage.max_attempts}): {e}")
+                    return
+                if stage.on_exhausted is None:
+                    self._count('failed')
+                    self._checkpoint(job_id, state='failed', attempts=attempts, last_error=error,
+                                     context=json.dumps(context), lease_until=None)
+                    print(f"❌ {self.name} job {job_id} failed at stage '{stage.name}': {e}")
+                    if self.on_failure:
+                        try:
+                            self.on_failure(context, e)
+                        except Exception:
+                            traceback.print_exc()
+                    return
+                context.update(stage.on_exhausted(context, e) or {})
+
+            stage_index += 1
+            attempts = 0
+            self._checkpoint(job_id, stage=stage_index, attempts=0, context=json.dumps(context),
+                             lease_until=time.time() + self.lease_seconds)
+
+        self._count('completed')
+        self._checkpoint(job_id, state='done', lease_until=None)
+        JOB_LATENCY.observe(time.time() - row['created_at'], queue=self.name)
+
+    def metrics(self):
+        """Queue depth, in-flight work and throughput counters for backpressure monitoring"""
+        rows = self._conn().execute(
+            'SELECT state, COUNT(*), MIN(created_at) FROM jobs WHERE queue = ? GROUP BY state',
+            (self.name,)
+        ).fetchall()
+        by_state = {row[0]: row[1] for row in rows}
+        oldest = {row[0]: row[2] for row in rows}
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+        queued_since = oldest.get('queued')
+        return {
+            'queue': self.name,
+            'workers': self.workers,
+            'in_flight': in_flight,
+            'depth': by_state.get('queued', 0),
+            'running': by_state.get('running', 0),
+            'done': by_state.get('done', 0),
+            'failed': by_state.get('failed', 0),
+            'oldest_queued_age': round(time.time() - queued_since, 3) if queued_since else 0,
+            'utilization': round(in_flight / self.workers, 3) if self.workers else 0,
+            'process': {'pid': os.getpid(), **counters}
+        }
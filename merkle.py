@@ -0,0 +1,63 @@
+import hashlib
+
+# domain separation so a leaf can never be passed off as an inner node
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def _to_bytes32(value):
+    if isinstance(value, bytes):
+        return value
+    return bytes.fromhex(value[2:] if value.startswith('0x') else value)
+
+
+def leaf_hash(grievance_id, audio_hash):
+    """sha256(0x00 ‖ grievanceId ‖ audioHash), matching GrievanceRegistry.leafHash"""
+    return hashlib.sha256(LEAF_PREFIX + str(grievance_id).encode() + _to_bytes32(audio_hash)).digest()
+
+
+def node_hash(a, b):
+    """Hashes a sorted pair so proofs need no left/right flags"""
+    if b < a:
+        a, b = b, a
+    return hashlib.sha256(NODE_PREFIX + a + b).digest()
+
+
+def build_tree(leaves):
+    """Returns every level of the tree, leaves first and the root level last.
+
+    An odd node at the end of a level is carried up unchanged instead of being
+    paired with itself.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(leaves):
+    return build_tree(leaves)[-1][0]
+
+
+def merkle_proof(levels, index):
+    """Sibling hashes from the leaf at `index` up to the root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf, proof, root):
+    computed = leaf
+    for sibling in proof:
+        computed = node_hash(computed, sibling)
+    return computed == root
@@ -0,0 +1,192 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# latency buckets in seconds; the long tail covers Gemini calls and Ethereum sends
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += self._samples(items)
+        return lines
+
+    def _samples(self, items):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self, items):
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(state['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Values are kept per process; each worker process exposes its own /metrics.
+    Callbacks added with `on_scrape` run before rendering, so gauges such as
+    queue depths are read only when something scrapes them.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def on_scrape(self, callback):
+        self._callbacks.append(callback)
+        return callback
+
+    def render(self):
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'prahari_http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'prahari_http_request_seconds', 'HTTP request latency by route', ('route',))
+
+# operation: recording_download, sha256, gemini_analysis, eth_submit, sms_send
+OPERATION_LATENCY = REGISTRY.histogram(
+    'prahari_operation_seconds', 'Latency of external calls and hashing', ('operation',))
+OPERATION_ERRORS = REGISTRY.counter(
+    'prahari_operation_errors_total', 'Failed external calls', ('operation',))
+EVENTS = REGISTRY.counter(
+    'prahari_events_total', 'Pipeline events that used to be logged line by line', ('event',))
+
+BLOCK_SEAL_FAILURES = REGISTRY.counter(
+    'prahari_block_seal_failures_total', 'Local block seals that failed and were retried')
+
+VERIFICATION_LOOKUPS = REGISTRY.counter(
+    'prahari_verification_lookups_total', 'Grievance verification lookups by cache result', ('result',))
+
+JOB_STAGE_LATENCY = REGISTRY.histogram(
+    'prahari_job_stage_seconds', 'Time spent running each job stage', ('queue', 'stage'))
+JOB_LATENCY = REGISTRY.histogram(
+    'prahari_job_seconds', 'Time from job submission to completion', ('queue',))
+
+QUEUE_DEPTH = REGISTRY.gauge('prahari_queue_depth', 'Items waiting to be processed', ('queue',))
+IN_FLIGHT = REGISTRY.gauge('prahari_in_flight', 'Items currently being processed', ('queue',))
+
+
+@contextmanager
+def timed(operation):
+    """Records the latency of an operation, and counts it as an error if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        OPERATION_ERRORS.inc(operation=operation)
+        raise
+    finally:
+        OPERATION_LATENCY.observe(time.perf_counter() - started, operation=operation)
@@ -0,0 +1,155 @@
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+
+class GrievanceStatus(str, Enum):
+    PENDING = 'Pending'
+    RESOLVED = 'Resolved'
+
+    def __str__(self):
+        return self.value
+
+
+class AnalysisState(str, Enum):
+    PENDING = 'pending'
+    COMPLETE = 'complete'
+    FAILED = 'failed'
+
+    def __str__(self):
+        return self.value
+
+
+class AnchorState(str, Enum):
+    UNANCHORED = 'unanchored'
+    SUBMITTED = 'submitted'
+    CONFIRMED = 'confirmed'
+    REVERTED = 'reverted'
+    FAILED = 'failed'
+
+    def __str__(self):
+        return self.value
+
+
+# report labels Gemini is prompted with, mapped to Grievance fields
+REPORT_FIELDS = {
+    'transcription': 'transcription',
+    'category': 'category',
+    'summary': 'summary',
+    'sentiment': 'sentiment',
+    'priority': 'priority',
+}
+PRIORITIES = ('High', 'Medium', 'Low')
+PENDING_ANALYSIS_TEXT = "🔄 AI Analysis in Progress..."
+
+
+def _clean_value(value):
+    value = value.strip().strip('*').strip()
+    if value.startswith('[') and value.endswith(']'):
+        value = value[1:-1].strip()
+    return value
+
+
+def parse_report(report):
+    """Parses Gemini's 'Label: value' report into Grievance analysis fields"""
+    parsed = {}
+    current = None
+    for line in (report or '').splitlines():
+        line = line.strip().lstrip('*-# ').strip()
+        if not line:
+            continue
+        label, sep, value = line.partition(':')
+        key = REPORT_FIELDS.get(label.strip().strip('*').strip().lower()) if sep else None
+        if key:
+            current = key
+            parsed[key] = _clean_value(value)
+        elif current == 'transcription':
+            # transcriptions can run over several lines
+            parsed[current] = f"{parsed[current]} {line}".strip()
+
+    if not parsed:
+        return {'analysis': AnalysisState.COMPLETE, 'analysis_note': (report or '').strip()}
+
+    # first word of e.g. "Water / Sanitation"; a blank or slash-only value has none
+    words = parsed.get('category', '').replace('/', ' ').split()
+    parsed['category'] = words[0] if words else 'Unknown'
+    priority = parsed.get('priority', '').capitalize()
+    parsed['priority'] = next((p for p in PRIORITIES if priority.startswith(p)), priority or None)
+    parsed['analysis'] = AnalysisState.COMPLETE
+    parsed['analysis_note'] = None
+    return parsed
+
+
+def failed_analysis(message):
+    """Analysis fields for a ticket whose report could not be produced"""
+    return {'analysis': AnalysisState.FAILED, 'analysis_note': message}
+
+
+@dataclass(slots=True)
+class Grievance:
+    """A single ticket; the AI report is parsed into typed fields once at ingest"""
+    g_id: str
+    created_at: float
+    status: GrievanceStatus = GrievanceStatus.PENDING
+    state: str = 'Not provided'
+    city: str = 'Not provided'
+    location: str = 'Not provided'
+    phone: Optional[str] = None
+    url: str = 'pending'
+    hash: str = 'pending'
+    analysis: AnalysisState = AnalysisState.PENDING
+    category: str = 'Unknown'
+    priority: Optional[str] = None
+    sentiment: Optional[str] = None
+    summary: Optional[str] = None
+    transcription: Optional[str] = None
+    analysis_note: Optional[str] = None
+    anchor: AnchorState = AnchorState.UNANCHORED
+    tx_hash: Optional[str] = None
+    tx_block: Optional[int] = None
+
+    @classmethod
+    def new(cls, g_id, **values):
+        return cls(g_id=g_id, created_at=time.time(), **values)
+
+    @classmethod
+    def from_row(cls, row):
+        values = {f.name: row[f.name] for f in fields(cls)}
+        values['status'] = GrievanceStatus(values['status'])
+        values['analysis'] = AnalysisState(values['analysis'])
+        values['anchor'] = AnchorState(values['anchor'])
+        return cls(**values)
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.created_at).strftime('%Y-%m-%d %H:%M:%S')
+
+    @property
+    def analysis_pending(self):
+        return self.analysis is AnalysisState.PENDING
+
+    @property
+    def ai_report(self):
+        """Report text in the original Gemini format, for display and the JSON API"""
+        if self.analysis_pending:
+            return PENDING_ANALYSIS_TEXT
+        if self.analysis_note:
+            return self.analysis_note
+        lines = [
+            ('Transcription', self.transcription),
+            ('Category', self.category),
+            ('Summary', self.summary),
+            ('Sentiment', self.sentiment),
+            ('Priority', self.priority),
+        ]
+        return '\n'.join(f"{label}: {value}" for label, value in lines if value)
+
+    def to_dict(self):
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data['status'] = self.status.value
+        data['analysis'] = self.analysis.value
+        data['anchor'] = self.anchor.value
+        data['timestamp'] = self.timestamp
+        return data
@@ -0,0 +1,101 @@
+import threading
+import time
+from storage import SQLiteConnections
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Takes tokens if available right now, without waiting"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Blocks until tokens are available; returns False if the timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class SharedTokenBucket(SQLiteConnections):
+    """Token bucket kept in a SQLite row, so every process sharing the database draws
+    from one budget of `rate` tokens per second (e.g. an account-wide API limit)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_buckets (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path, name, rate, capacity=None):
+        self.path = path
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        conn.execute('INSERT OR IGNORE INTO rate_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                     (name, self.capacity, time.time()))
+
+    def _take(self, tokens):
+        """Takes tokens if available; returns 0, or the seconds until they will be"""
+        with self._transaction() as conn:
+            row = conn.execute('SELECT tokens, updated_at FROM rate_buckets WHERE name = ?', (self.name,)).fetchone()
+            now = time.time()
+            available = min(self.capacity, row['tokens'] + max(0.0, now - row['updated_at']) * self.rate)
+            if available >= tokens:
+                available -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens - available) / self.rate
+            conn.execute('UPDATE rate_buckets SET tokens = ?, updated_at = ? WHERE name = ?',
+                         (available, now, self.name))
+        return wait
+
+    def try_acquire(self, tokens=1):
+        """Takes tokens if available right now, without waiting"""
+        return self._take(tokens) == 0
+
+    def acquire(self, tokens=1, timeout=None):
+        """Blocks until tokens are available; returns False if the timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import OPERATION_LATENCY, timed
+from storage import SQLiteConnections
+
+CHUNK_SIZE = 64 * 1024
+MIN_RECORDING_BYTES = 1000
+
+# shared keep-alive session, sized so every job worker can hold a pooled connection
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(os.getenv('JOB_WORKERS', '4')))
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+
+class RecordingDownloadError(Exception):
+    pass
+
+
+def download_recording(url, dest_path, auth=None, timeout=30):
+    """Streams a recording to dest_path, hashing each chunk as it is written.
+
+    The file is written once to a temporary name next to dest_path and moved into
+    place with an atomic rename, so readers never see a partial recording.
+    Returns (sha256_hex, size_in_bytes).
+    """
+    os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+    part_path = f"{dest_path}.part"
+    hasher = hashlib.sha256()
+    size = 0
+    hash_seconds = 0.0
+
+    try:
+        with timed('recording_download'), _session.get(url, auth=auth, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                raise RecordingDownloadError(f"Recording download failed (HTTP {response.status_code})")
+            with open(part_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    started = time.perf_counter()
+                    hasher.update(chunk)
+                    hash_seconds += time.perf_counter() - started
+                    f.write(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+        OPERATION_LATENCY.observe(hash_seconds, operation='sha256')
+
+        if size <= MIN_RECORDING_BYTES:
+            raise RecordingDownloadError(f"Recording too small ({size} bytes)")
+        os.replace(part_path, dest_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    return hasher.hexdigest(), size
+
+
+class RecordingStore(SQLiteConnections):
+    """Content-addressed recording storage.
+
+    Each recording is kept once at `root/ab/cd/<sha256>.wav`, however many
+    tickets uploaded the same audio. SQLite maps ticket IDs to hashes and keeps
+    a running file count and byte total, so nothing has to list the directory.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS recording_blobs (
+            hash TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            refs INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS recording_refs (
+            g_id TEXT PRIMARY KEY,
+            hash TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS recording_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            files INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            duplicates INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO recording_stats (id, files, bytes, duplicates) VALUES (1, 0, 0, 0);
+    """
+
+    def __init__(self, path, root, url_prefix='recordings'):
+        self.path = path
+        # absolute, so files resolve the same for the workers, send_file and os.path checks
+        self.root = os.path.abspath(root)
+        self.url_prefix = url_prefix
+        self._conn().executescript(self.SCHEMA)
+
+    @staticmethod
+    def relative_path(file_hash):
+        return f"{file_hash[:2]}/{file_hash[2:4]}/{file_hash}.wav"
+
+    def path_for(self, file_hash):
+        return os.path.join(self.root, self.relative_path(file_hash))
+
+    def url_for(self, file_hash):
+        """Path relative to the store root, as stored in the grievance's url field"""
+        return f"{self.url_prefix}/{self.relative_path(file_hash)}"
+
+    def save(self, url, g_id, auth=None, timeout=30):
+        """Downloads a recording for a ticket and stores it by content.
+
+        The download lands in `root/incoming/` and is either moved into its
+        shard or, if the same audio is already stored, discarded.
+        Returns (sha256_hex, path).
+        """
+        staging_path = os.path.join(self.root, 'incoming', f"{g_id}.wav")
+        file_hash, size = download_recording(url, staging_path, auth=auth, timeout=timeout)
+        try:
+            self._add(g_id, file_hash, size, staging_path)
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+        return file_hash, self.path_for(file_hash)
+
+    def _add(self, g_id, file_hash, size, staging_path):
+        dest_path = self.path_for(file_hash)
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            previous = conn.execute('SELECT hash FROM recording_refs WHERE g_id = ?', (g_id,)).fetchone()
+            if previous and previous['hash'] == file_hash:
+                conn.execute('COMMIT')
+                return
+            stored = conn.execute('SELECT 1 FROM recording_blobs WHERE hash = ?', (file_hash,)).fetchone()
+            if stored and os.path.exists(dest_path):
+                conn.execute('UPDATE recording_stats SET duplicates = duplicates + 1 WHERE id = 1')
+            else:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                os.replace(staging_path, dest_path)
+                if not stored:
+                    conn.execute('INSERT INTO recording_blobs (hash, size, created_at) VALUES (?, ?, ?)',
+                                 (file_hash, size, time.time()))
+                    conn.execute('UPDATE recording_stats SET files = files + 1, bytes = bytes + ? WHERE id = 1',
+                                 (size,))
+            conn.execute('UPDATE recording_blobs SET refs = refs + 1 WHERE hash = ?', (file_hash,))
+            conn.execute('INSERT OR REPLACE INTO recording_refs (g_id, hash) VALUES (?, ?)', (g_id, file_hash))
+            if previous:
+                self._release(conn, previous['hash'])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _release(self, conn, file_hash):
+        """Drops one reference to a blob, deleting the file once nothing points at it"""
+        conn.execute('UPDATE recording_blobs SET refs = refs - 1 WHERE hash = ?', (file_hash,))
+        row = conn.execute('SELECT refs, size FROM recording_blobs WHERE hash = ?', (file_hash,)).fetchone()
+        if row and row['refs'] <= 0:
+            conn.execute('DELETE FROM recording_blobs WHERE hash = ?', (file_hash,))
+            conn.execute('UPDATE recording_stats SET files = files - 1, bytes = bytes - ? WHERE id = 1',
+                         (row['size'],))
+            if os.path.exists(self.path_for(file_hash)):
+                os.remove(self.path_for(file_hash))
+
+    def hash_for(self, g_id):
+        row = self._conn().execute('SELECT hash FROM recording_refs WHERE g_id = ?', (g_id,)).fetchone()
+        return row['hash'] if row else None
+
+    def stats(self):
+        conn = self._conn()
+        files, size, duplicates = conn.execute(
+            'SELECT files, bytes, duplicates FROM recording_stats WHERE id = 1'
+        ).fetchone()
+        tickets = conn.execute('SELECT COUNT(*) FROM recording_refs').fetchone()[0]
+        return {'files': files, 'bytes': size, 'tickets': tickets, 'duplicates': duplicates}
+
+    def verify(self, file_hash):
+        """Re-hashes one stored blob; shared by every ticket that uploaded it"""
+        hasher = hashlib.sha256()
+        try:
+            with open(self.path_for(file_hash), 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+        except FileNotFoundError:
+            return False
+        return hasher.hexdigest() == file_hash
+
+
+def create_recording_store():
+    """Recording store sharing the grievance database file"""
+    # kept outside static/ so recordings are only reachable through the authenticated route
+    return RecordingStore(
+        os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'),
+        os.getenv('RECORDINGS_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+    )
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from metrics import BLOCK_SEAL_FAILURES
+from storage import SQLiteConnections
+
+
+class BlockSealer(SQLiteConnections):
+    """Single writer that groups queued entries into blocks.
+
+    Producers only insert into a SQLite table, so queued entries survive a
+    restart. One thread drains it and calls `seal(entries)` once
+    `max_entries` are waiting or the oldest entry is `max_wait` seconds old,
+    so blocks are sealed in arrival order and never concurrently. Entries
+    leave the table only after `seal` returns; a failing batch is retried
+    with backoff until it seals, never dropped.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chain_pending (
+            grievance_id TEXT PRIMARY KEY,
+            entry TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_chain_pending_age ON chain_pending(created_at);
+    """
+
+    def __init__(self, path, seal, max_entries=100, max_wait=0.5, retry_max=30.0):
+        self.path = path
+        self.seal = seal
+        self.max_entries = max_entries
+        self.max_wait = max_wait
+        self.retry_max = retry_max
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.stats = {'blocks': 0, 'entries': 0, 'failures': 0}
+        self._conn().executescript(self.SCHEMA)
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='block-sealer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Seals whatever is still queued, then stops the writer"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join(10)
+            self._thread = None
+
+    def add(self, entry):
+        self._conn().execute(
+            'INSERT OR IGNORE INTO chain_pending (grievance_id, entry, created_at) VALUES (?, ?, ?)',
+            (str(entry['grievance_id']), json.dumps(entry), time.time())
+        )
+        self._wakeup.set()
+
+    def pending(self):
+        return self._conn().execute('SELECT COUNT(*) FROM chain_pending').fetchone()[0]
+
+    def _next_batch(self):
+        return self._conn().execute(
+            'SELECT grievance_id, entry, created_at FROM chain_pending ORDER BY created_at LIMIT ?',
+            (self.max_entries,)
+        ).fetchall()
+
+    def _run(self):
+        failures = 0
+        while True:
+            rows = self._next_batch()
+            if not rows:
+                if self._stopping.is_set():
+                    return
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            wait = rows[0]['created_at'] + self.max_wait - time.time()
+            if len(rows) < self.max_entries and wait > 0 and not self._stopping.is_set():
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue
+            if self._seal([json.loads(row['entry']) for row in rows], [row['grievance_id'] for row in rows]):
+                failures = 0
+            else:
+                failures += 1
+                if self._stopping.wait(min(2 ** (failures - 1), self.retry_max)):
+                    return
+
+    def _seal(self, batch, grievance_ids):
+        try:
+            self.seal(batch)
+        except Exception as e:
+            self.stats['failures'] += 1
+            BLOCK_SEAL_FAILURES.inc()
+            print(f"❌ Block sealing failed for {len(batch)} entries, will retry: {e}")
+            return False
+        self._conn().executemany('DELETE FROM chain_pending WHERE grievance_id = ?',
+                                 [(grievance_id,) for grievance_id in grievance_ids])
+        self.stats['blocks'] += 1
+        self.stats['entries'] += len(batch)
+        return True
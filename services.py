@@ -0,0 +1,104 @@
+import threading
+import time
+
+
+class ServiceUnavailable(RuntimeError):
+    """Raised when an external client cannot be created"""
+
+
+class ServiceRegistry:
+    """Owns the external clients (Twilio, Gemini, Web3) and their health state.
+
+    Clients are built on first use instead of at import time, and connectivity
+    checks run on a background thread, so a slow or unreachable endpoint never
+    delays startup. A failed factory is retried on the next use or check.
+    """
+
+    def __init__(self, check_interval=60.0):
+        self.check_interval = check_interval
+        self._factories = {}
+        self._checks = {}
+        self._clients = {}
+        self._health = {}
+        self._locks = {}
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def register(self, name, factory, check=None, enabled=True):
+        """`factory()` builds the client; `check(client)` raises or returns False when it is down.
+        Disabled services (not configured) are never built or checked. Registering
+        a name again replaces its factory and drops any client already built."""
+        self._factories[name] = factory
+        self._clients.pop(name, None)
+        self._checks[name] = check
+        self._locks[name] = threading.Lock()
+        self._health[name] = {'state': 'unknown' if enabled else 'disabled',
+                              'checked_at': None, 'latency_ms': None, 'error': None}
+
+    def enabled(self, name):
+        return self._health[name]['state'] != 'disabled'
+
+    def get(self, name):
+        if not self.enabled(name):
+            raise ServiceUnavailable(f"{name} is not configured")
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._locks[name]:
+            client = self._clients.get(name)
+            if client is None:
+                try:
+                    client = self._factories[name]()
+                except Exception as e:
+                    self._record(name, 'down', error=str(e))
+                    raise ServiceUnavailable(f"{name} unavailable: {e}") from e
+                self._clients[name] = client
+        return client
+
+    def _record(self, name, state, latency=None, error=None):
+        self._health[name] = {
+            'state': state,
+            'checked_at': time.time(),
+            'latency_ms': round(latency * 1000, 1) if latency is not None else None,
+            'error': error
+        }
+
+    def check(self, name):
+        if not self.enabled(name):
+            return False
+        started = time.time()
+        try:
+            client = self.get(name)
+            check = self._checks[name]
+            if check is not None and check(client) is False:
+                raise ServiceUnavailable(f"{name} check failed")
+        except Exception as e:
+            self._record(name, 'down', time.time() - started, str(e))
+            return False
+        self._record(name, 'up', time.time() - started)
+        return True
+
+    def is_up(self, name):
+        return self._health[name]['state'] == 'up'
+
+    def health(self):
+        return {name: dict(state) for name, state in self._health.items()}
+
+    def start_health_checks(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='service-health', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def _run(self):
+        while True:
+            for name in list(self._factories):
+                if self._stopping.is_set():
+                    return
+                self.check(name)
+            if self._stopping.wait(self.check_interval):
+                return
@@ -0,0 +1,110 @@
+import os
+import time
+from storage import SQLiteConnections
+
+
+class SQLiteSessionStore(SQLiteConnections):
+    """In-progress IVR call state keyed by CallSid, kept apart from grievances.
+
+    Sessions expire `ttl` seconds after they were last touched, and once more
+    than `max_sessions` are stored the least recently touched ones are evicted,
+    so abandoned calls never accumulate. Backed by SQLite in WAL mode, so every
+    worker process sees the same sessions.
+    """
+
+    FIELDS = ('state', 'city', 'location')
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS call_sessions (
+            call_sid TEXT PRIMARY KEY,
+            state TEXT,
+            city TEXT,
+            location TEXT,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_call_sessions_updated_at ON call_sessions(updated_at);
+    """
+
+    def __init__(self, path, ttl=3600.0, max_sessions=10000, sweep_every=100):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self._conn().executescript(self.SCHEMA)
+        self.sweep()
+
+    def get(self, call_sid):
+        """Session fields of a live call; reading a session counts as touching it"""
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            'SELECT state, city, location FROM call_sessions WHERE call_sid = ? AND updated_at >= ?',
+            (call_sid, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return {}
+        conn.execute('UPDATE call_sessions SET updated_at = ? WHERE call_sid = ?', (now, call_sid))
+        return dict(row)
+
+    def update(self, call_sid, **fields):
+        fields = {col: value for col, value in fields.items() if col in self.FIELDS}
+        columns = ''.join(f', {col}' for col in fields)
+        placeholders = ''.join(', ?' for _ in fields)
+        updates = ''.join(f', {col} = excluded.{col}' for col in fields)
+        self._conn().execute(
+            f'INSERT INTO call_sessions (call_sid, updated_at{columns}) VALUES (?, ?{placeholders}) '
+            f'ON CONFLICT(call_sid) DO UPDATE SET updated_at = excluded.updated_at{updates}',
+            [call_sid, time.time()] + list(fields.values())
+        )
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.sweep()
+
+    def pop(self, call_sid):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT state, city, location FROM call_sessions WHERE call_sid = ? AND updated_at >= ?',
+                (call_sid, time.time() - self.ttl)
+            ).fetchone()
+            conn.execute('DELETE FROM call_sessions WHERE call_sid = ?', (call_sid,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return dict(row) if row else {}
+
+    def sweep(self):
+        """Drops expired sessions, then the least recently touched ones above the size bound"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            expired = conn.execute(
+                'DELETE FROM call_sessions WHERE updated_at < ?', (time.time() - self.ttl,)
+            ).rowcount
+            excess = conn.execute('SELECT COUNT(*) FROM call_sessions').fetchone()[0] - self.max_sessions
+            if excess > 0:
+                conn.execute(
+                    'DELETE FROM call_sessions WHERE call_sid IN '
+                    '(SELECT call_sid FROM call_sessions ORDER BY updated_at LIMIT ?)',
+                    (excess,)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return expired + max(excess, 0)
+
+    def count(self):
+        return self._conn().execute('SELECT COUNT(*) FROM call_sessions').fetchone()[0]
+
+
+def create_session_store():
+    """Call-session store sharing the grievance database file"""
+    return SQLiteSessionStore(
+        os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'),
+        ttl=float(os.getenv('SESSION_TTL_SECONDS', '3600')),
+        max_sessions=int(os.getenv('SESSION_MAX', '10000'))
+    )
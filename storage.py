@@ -0,0 +1,305 @@
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from dataclasses import fields as dataclass_fields
+from models import Grievance, parse_report
+
+
+def connect(path):
+    """Opens a SQLite connection tuned for concurrent access from several processes"""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    # REPLACE conflicts fire delete triggers, so the analytics counters see the old row leave
+    conn.execute('PRAGMA recursive_triggers=ON')
+    return conn
+
+
+class SQLiteConnections:
+    """Per-thread connections to the SQLite file at `self.path`.
+
+    SQLite connections must not be shared between threads, so each thread
+    opens its own on first use.
+    """
+
+    def _conn(self):
+        """Returns this thread's connection, opening it on first use"""
+        local = self.__dict__.get('_local')
+        if local is None:
+            local = self.__dict__.setdefault('_local', threading.local())
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = connect(self.path)
+            local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn=None):
+        """Runs the block in a write transaction, rolled back if it raises"""
+        conn = conn or self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+SORTABLE_COLUMNS = ('created_at', 'status', 'category', 'priority', 'state', 'city', 'g_id')
+
+
+def tokenize(text):
+    """Lower-cased search terms of a text, as used by the inverted index"""
+    return {token for token in TOKEN_PATTERN.findall((text or '').lower()) if len(token) > 1}
+
+
+class GrievanceStore:
+    """Storage interface for grievances; call sessions live in sessions.py"""
+
+    def insert(self, grievance):
+        raise NotImplementedError
+
+    def get(self, g_id):
+        raise NotImplementedError
+
+    def exists(self, g_id):
+        return self.get(g_id) is not None
+
+    def update(self, g_id, **fields):
+        raise NotImplementedError
+
+    def page(self, query=None, status=None, sort='created_at', descending=True, limit=20, offset=0):
+        raise NotImplementedError
+
+    def count(self, status=None):
+        raise NotImplementedError
+
+
+class SQLiteGrievanceStore(SQLiteConnections, GrievanceStore):
+    """Embedded SQLite backend in WAL mode, safe to share between worker processes"""
+
+    COLUMNS = tuple(f.name for f in dataclass_fields(Grievance) if f.name != 'g_id')
+    SEARCH_FIELDS = ('transcription', 'summary', 'location', 'city', 'state', 'category')
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS grievances (
+            g_id TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'Pending',
+            state TEXT,
+            city TEXT,
+            location TEXT,
+            phone TEXT,
+            url TEXT,
+            hash TEXT,
+            analysis TEXT NOT NULL DEFAULT 'pending',
+            category TEXT NOT NULL DEFAULT 'Unknown',
+            priority TEXT,
+            sentiment TEXT,
+            summary TEXT,
+            transcription TEXT,
+            analysis_note TEXT,
+            anchor TEXT NOT NULL DEFAULT 'unanchored',
+            tx_hash TEXT,
+            tx_block INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS search_terms (
+            term TEXT NOT NULL,
+            g_id TEXT NOT NULL,
+            PRIMARY KEY (term, g_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_search_terms_g_id ON search_terms(g_id);
+    """
+
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_grievances_status ON grievances(status);
+        CREATE INDEX IF NOT EXISTS idx_grievances_state_city ON grievances(state, city);
+        CREATE INDEX IF NOT EXISTS idx_grievances_category ON grievances(category);
+        CREATE INDEX IF NOT EXISTS idx_grievances_created_at ON grievances(created_at);
+    """
+
+    # columns added after the first schema, with their SQL definitions
+    MIGRATED_COLUMNS = {
+        'created_at': 'REAL',
+        'analysis': "TEXT NOT NULL DEFAULT 'pending'",
+        'priority': 'TEXT',
+        'sentiment': 'TEXT',
+        'summary': 'TEXT',
+        'transcription': 'TEXT',
+        'analysis_note': 'TEXT',
+        'anchor': "TEXT NOT NULL DEFAULT 'unanchored'",
+        'tx_hash': 'TEXT',
+        'tx_block': 'INTEGER',
+    }
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        self._migrate(conn)
+        conn.executescript(self.INDEXES)
+        self._backfill_search_index(conn)
+
+    def _migrate(self, conn):
+        """Adds columns introduced after a database was created, and upgrades
+        databases from before reports were stored as typed fields"""
+        existing = {row['name'] for row in conn.execute('PRAGMA table_info(grievances)')}
+        missing = [column for column in self.MIGRATED_COLUMNS if column not in existing]
+        if not missing and 'ai_report' not in existing:
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            existing = {row['name'] for row in conn.execute('PRAGMA table_info(grievances)')}
+            for column, definition in self.MIGRATED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE grievances ADD COLUMN {column} {definition}')
+            if 'ai_report' not in existing:
+                conn.execute('COMMIT')
+                return
+            conn.execute(
+                "UPDATE grievances SET created_at = CAST(strftime('%s', timestamp, 'utc') AS REAL) "
+                "WHERE created_at IS NULL"
+            )
+            conn.execute('UPDATE grievances SET created_at = 0 WHERE created_at IS NULL')
+            rows = conn.execute('SELECT g_id, ai_report FROM grievances').fetchall()
+            for row in rows:
+                report = row['ai_report'] or ''
+                if '🔄' in report or 'Progress' in report:
+                    continue
+                if report.startswith(('❌', 'AI Analysis Failed')):
+                    fields = {'analysis': 'failed', 'analysis_note': report}
+                else:
+                    fields = self._sql_fields(parse_report(report))
+                assignments = ', '.join(f'{col} = ?' for col in fields)
+                conn.execute(f'UPDATE grievances SET {assignments} WHERE g_id = ?',
+                             list(fields.values()) + [row['g_id']])
+            conn.execute('ALTER TABLE grievances RENAME COLUMN ai_report TO legacy_ai_report')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        print(f"🔧 Migrated {len(rows)} grievance(s) to typed analysis fields")
+
+    def _backfill_search_index(self, conn):
+        """Indexes grievances stored before the search index existed"""
+        with self._transaction(conn):
+            rows = conn.execute(
+                'SELECT * FROM grievances WHERE g_id NOT IN (SELECT DISTINCT g_id FROM search_terms)'
+            ).fetchall()
+            for row in rows:
+                self._index(conn, row)
+
+    def _index(self, conn, row):
+        """Rebuilds the inverted index entries of one grievance row"""
+        terms = {row['g_id'].lower()}
+        for field in self.SEARCH_FIELDS:
+            terms |= tokenize(row[field])
+        conn.execute('DELETE FROM search_terms WHERE g_id = ?', (row['g_id'],))
+        conn.executemany('INSERT INTO search_terms (term, g_id) VALUES (?, ?)',
+                         [(term, row['g_id']) for term in terms])
+
+    @staticmethod
+    def _sql_fields(fields):
+        return {col: value.value if isinstance(value, Enum) else value for col, value in fields.items()}
+
+    def insert(self, grievance):
+        columns = ('g_id',) + self.COLUMNS
+        values = self._sql_fields({col: getattr(grievance, col) for col in columns})
+        placeholders = ', '.join('?' * len(columns))
+        with self._transaction(self._conn()) as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO grievances ({', '.join(columns)}) VALUES ({placeholders})",
+                list(values.values())
+            )
+            self._index(conn, values)
+
+    def get(self, g_id):
+        row = self._conn().execute('SELECT * FROM grievances WHERE g_id = ?', (g_id,)).fetchone()
+        return Grievance.from_row(row) if row else None
+
+    def exists(self, g_id):
+        row = self._conn().execute('SELECT 1 FROM grievances WHERE g_id = ?', (g_id,)).fetchone()
+        return row is not None
+
+    def update(self, g_id, **fields):
+        """Updates the given fields, returns False if the grievance does not exist"""
+        unknown = set(fields) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown grievance fields: {', '.join(sorted(unknown))}")
+        if not fields:
+            return self.exists(g_id)
+        fields = self._sql_fields(fields)
+        assignments = ', '.join(f'{col} = ?' for col in fields)
+        with self._transaction(self._conn()) as conn:
+            cursor = conn.execute(
+                f'UPDATE grievances SET {assignments} WHERE g_id = ?',
+                list(fields.values()) + [g_id]
+            )
+            updated = cursor.rowcount > 0
+            if updated and any(field in self.SEARCH_FIELDS for field in fields):
+                self._index(conn, conn.execute('SELECT * FROM grievances WHERE g_id = ?', (g_id,)).fetchone())
+        return updated
+
+    def _where(self, status=None):
+        if status is None:
+            return '', []
+        return ' WHERE status = ?', [status.value if isinstance(status, Enum) else status]
+
+    def page(self, query=None, status=None, sort='created_at', descending=True, limit=20, offset=0):
+        """One sorted page of grievances, optionally filtered by a search query.
+
+        Every query term is matched as a prefix against the inverted index, and a
+        grievance must match all terms. Returns (list of Grievance, total matches).
+        """
+        if sort not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort grievances by: {sort}")
+        where, params = self._where(status=status)
+        clauses = [where[len(' WHERE '):]] if where else []
+        terms = sorted(tokenize(query)) if query else []
+        if query and not terms:
+            # single characters are not indexed; only an exact ticket id can match
+            terms = [query.strip().lower()]
+        if terms:
+            matches = ' INTERSECT '.join(
+                'SELECT g_id FROM search_terms WHERE term >= ? AND term < ?' for _ in terms
+            )
+            clauses.append(f'g_id IN ({matches})')
+            for term in terms:
+                params += [term, term + '\uffff']
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        conn = self._conn()
+        total = conn.execute(f'SELECT COUNT(*) FROM grievances{where}', params).fetchone()[0]
+        direction = 'DESC' if descending else 'ASC'
+        rows = conn.execute(
+            f'SELECT * FROM grievances{where} ORDER BY {sort} {direction}, rowid {direction} LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        ).fetchall()
+        return [Grievance.from_row(row) for row in rows], total
+
+    def count(self, status=None):
+        where, params = self._where(status=status)
+        return self._conn().execute(f'SELECT COUNT(*) FROM grievances{where}', params).fetchone()[0]
+
+
+STORE_BACKENDS = {
+    'sqlite': SQLiteGrievanceStore,
+}
+
+
+def create_store():
+    """Builds the storage backend selected by GRIEVANCE_STORE (default: sqlite)"""
+    backend = os.getenv('GRIEVANCE_STORE', 'sqlite').lower()
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown GRIEVANCE_STORE backend: {backend}")
+    return STORE_BACKENDS[backend](os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'))
@@ -0,0 +1,99 @@
+import math
+import os
+import threading
+from collections import deque
+from storage import SQLiteConnections
+
+# multiplier of the permutation; coprime with 9 * 10^k for every width
+PERMUTATION_MULTIPLIER = 611953
+PERMUTATION_OFFSET = 104729
+
+
+class TicketIdAllocator(SQLiteConnections):
+    """Hands out unique numeric ticket IDs without coordinating on every call.
+
+    IDs of a given width are positions 0..N-1 of that width's space, mapped
+    through an affine permutation so consecutive tickets do not get consecutive
+    numbers. Each process reserves a block of positions with one SQLite
+    transaction and then allocates locally. When a width's space is used up,
+    the next reservation moves to IDs one digit wider. Every candidate is still
+    checked against the grievance store and the chain, so IDs issued before
+    the allocator existed are never reused.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ticket_id_allocator (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            width INTEGER NOT NULL,
+            next_position INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path, width=6, block_size=100, is_taken=None):
+        self.path = path
+        self.block_size = block_size
+        self.is_taken = is_taken
+        self._lock = threading.Lock()
+        self._width = width
+        self._positions = deque()
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        conn.execute('INSERT OR IGNORE INTO ticket_id_allocator (id, width, next_position) VALUES (1, ?, 0)',
+                     (width,))
+
+    @staticmethod
+    def space(width):
+        return 9 * 10 ** (width - 1)
+
+    @staticmethod
+    def format(width, position):
+        """Ticket ID at a position of a width's permuted space"""
+        size = TicketIdAllocator.space(width)
+        multiplier = PERMUTATION_MULTIPLIER % size
+        while math.gcd(multiplier, size) != 1:
+            multiplier += 1
+        return str(10 ** (width - 1) + (multiplier * position + PERMUTATION_OFFSET) % size)
+
+    @property
+    def width(self):
+        """Digits in the IDs currently being issued"""
+        return self._width
+
+    def _reserve(self):
+        """Claims the next block of positions, widening the format once a width is exhausted"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            width, start = conn.execute(
+                'SELECT width, next_position FROM ticket_id_allocator WHERE id = 1'
+            ).fetchone()
+            if start >= self.space(width):
+                width, start = width + 1, 0
+                print(f"🔢 Ticket ID space exhausted, widening to {width} digits")
+            end = min(start + self.block_size, self.space(width))
+            conn.execute('UPDATE ticket_id_allocator SET width = ?, next_position = ? WHERE id = 1',
+                         (width, end))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._width = width
+        self._positions.extend((width, position) for position in range(start, end))
+
+    def allocate(self):
+        with self._lock:
+            while True:
+                if not self._positions:
+                    self._reserve()
+                g_id = self.format(*self._positions.popleft())
+                if not (self.is_taken and self.is_taken(g_id)):
+                    return g_id
+
+
+def create_ticket_id_allocator(is_taken=None):
+    return TicketIdAllocator(
+        os.getenv('GRIEVANCE_DB_PATH', 'prahari.db'),
+        width=int(os.getenv('TICKET_ID_DIGITS', '6')),
+        block_size=int(os.getenv('TICKET_ID_BLOCK_SIZE', '100')),
+        is_taken=is_taken
+    )
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerificationCache:
+    """LRU cache of grievance verification results.
+
+    Final results (a registration confirmed on Ethereum, or a sealed local
+    block when Ethereum is not in use) never change, so they are kept until
+    evicted by the size bound. Everything else, "not found" in particular,
+    expires after `short_ttl` seconds so a newly anchored grievance shows up
+    without an explicit invalidation from another process.
+
+    Invalidations are remembered per id for `max_lookup_seconds`. A `put`
+    that passes the `time.monotonic()` its lookup started at is dropped if
+    that id was invalidated since, so a result computed before the sealer or
+    a transaction update cannot overwrite the fresh state. Lookups of other
+    ids are unaffected.
+    """
+
+    def __init__(self, max_entries=10000, short_ttl=30.0, max_lookup_seconds=60.0):
+        self.max_entries = max_entries
+        self.short_ttl = short_ttl
+        self.max_lookup_seconds = max_lookup_seconds
+        self._entries = OrderedDict()
+        self._invalidated = OrderedDict()  # grievance_id -> monotonic time of its last invalidation
+        self._cleared_at = -1.0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, grievance_id):
+        """A copy of the cached result, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(grievance_id)
+            if entry is not None and entry[1] is not None and entry[1] < time.monotonic():
+                del self._entries[grievance_id]
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(grievance_id)
+            self.stats['hits'] += 1
+            # callers decorate results (e.g. with the grievance record) before rendering
+            return dict(entry[0])
+
+    def _forget_old_invalidations(self, now):
+        horizon = now - self.max_lookup_seconds
+        while self._invalidated and next(iter(self._invalidated.values())) < horizon:
+            self._invalidated.popitem(last=False)
+
+    def put(self, grievance_id, result, final, started=None):
+        now = time.monotonic()
+        expires = None if final else now + self.short_ttl
+        with self._lock:
+            if started is not None:
+                self._forget_old_invalidations(now)
+                # invalidated while the result was being computed (or the lookup outlived the
+                # window invalidations are remembered for), so it may be stale
+                if (started < now - self.max_lookup_seconds or started <= self._cleared_at
+                        or self._invalidated.get(grievance_id, -1) >= started):
+                    return
+            self._entries[grievance_id] = (dict(result), expires)
+            self._entries.move_to_end(grievance_id)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, grievance_id):
+        with self._lock:
+            now = time.monotonic()
+            self._invalidated[grievance_id] = now
+            self._invalidated.move_to_end(grievance_id)
+            self._forget_old_invalidations(now)
+            self._entries.pop(grievance_id, None)
+
+    def clear(self):
+        with self._lock:
+            # every lookup in flight predates the clear
+            self._cleared_at = time.monotonic()
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)